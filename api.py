@@ -0,0 +1,299 @@
+# api.py
+# HTTP API (JSON) untuk klien selain Streamlit. Memakai bundle model yang sama
+# dengan app (utils.recommender.get_bundle), termasuk hot-reload versi baru.
+#
+#   python api.py --port 8000
+#
+#   GET  /health
+#   GET  /moods
+#   GET  /recommend/mood?mood=Happy&n=10&method=popularity
+#   GET  /recommend/song?track_id=...&n=10[&mood=Calm][&genre=pop|same][&genre_weight=0.5]
+#   GET  /recommend/songs?track_ids=a,b,c&n=10    (atau POST JSON {"track_ids": [...], "n": 10})
+#        (filter mood/genre & genre_weight juga berlaku; genre=same = genre utama tiap seed)
+#   GET  /recommend/playlist?track_ids=a,b,c&n=10  (atau POST JSON, opsional "weights": [...])
+#        satu rekomendasi dari profil gabungan semua seed
+#   GET  /recommend/daily?n=6[&mood=Happy][&weighted=1]   set "lagu hari ini" (sama untuk semua klien;
+#        weighted=1 = berbobot popularitas, default acak seragam)
+#   GET  /search?q=...&limit=10
+#   GET  /metrics               (format Prometheus; /metrics.json untuk JSON)
+import json
+import math
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from recommender import RANKING_METHODS, Recommender
+from utils import perf
+from utils.recommender import (
+    get_bundle, recommend_by_seeds, recommend_by_song, recommend_by_songs, register_resource,
+)
+
+# Batas ukuran hasil & body per request
+MAX_RESULTS = 100
+MAX_SEEDS = 500
+MAX_BODY = 1 << 20
+
+register_resource("recommender", lambda b: Recommender(catalog=b.catalog, version=b.version))
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _clean(value):
+    # NaN tidak valid di JSON -> null
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, dict):
+        return {k: _clean(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_clean(v) for v in value]
+    return value
+
+
+def _records(df):
+    return df.to_dict(orient="records") if len(df) else []
+
+
+def _int(params, name, default, upper):
+    try:
+        value = int(params.get(name, default))
+    except (TypeError, ValueError):
+        raise ApiError(400, f"'{name}' harus bilangan bulat")
+    if value < 1:
+        raise ApiError(400, f"'{name}' minimal 1")
+    return min(value, upper)
+
+
+def _scalar(value):
+    return isinstance(value, (str, int, float)) and not isinstance(value, bool)
+
+
+def _json_params(body):
+    """
+    Parameter dari body JSON dalam bentuk yang sama dengan query string:
+    string/angka -> str, list string/angka tetap list, null dibuang.
+    Tipe lain (objek, boolean) ditolak.
+    """
+    params = {}
+    for name, value in body.items():
+        if value is None:
+            continue
+        if isinstance(value, list) and all(_scalar(v) for v in value):
+            params[name] = value
+        elif _scalar(value):
+            params[name] = str(value)
+        else:
+            raise ApiError(400, f"'{name}' harus string, angka, atau list string/angka")
+    return params
+
+
+def _required(params, name):
+    value = params.get(name)
+    if not isinstance(value, str) or not value.strip():
+        raise ApiError(400, f"parameter '{name}' wajib diisi (string)")
+    return value.strip()
+
+
+def _similarity_args(params):
+    # filter mood/genre opsional (lihat utils.recommender.SimilarityFilters)
+    out = {}
+    for name in ("mood", "genre"):
+        value = params.get(name)
+        if isinstance(value, str) and value.strip():
+            out[name] = value.strip()
+    # bobot kemiripan genre (0 = audio saja), lihat utils.recommender.GENRE_WEIGHT
+    if "genre_weight" in params:
+        try:
+            weight = float(params["genre_weight"])
+        except (TypeError, ValueError):
+            raise ApiError(400, "'genre_weight' harus angka")
+        if not 0 <= weight <= 10:
+            raise ApiError(400, "'genre_weight' harus di antara 0 dan 10")
+        out["genre_weight"] = weight
+    return out
+
+
+# ENDPOINT: (bundle, params) -> objek JSON
+def health(bundle, params):
+    return {"status": "ok", "version": bundle.version, "n_tracks": len(bundle.catalog)}
+
+
+def moods(bundle, params):
+    return {"moods": bundle.catalog.moods()}
+
+
+def recommend_mood(bundle, params):
+    method = params.get("method", "popularity")
+    if method not in RANKING_METHODS:
+        raise ApiError(400, f"method tidak dikenal: {method!r} (pilihan: {', '.join(RANKING_METHODS)})")
+    n = _int(params, "n", 10, MAX_RESULTS)
+    results = bundle.resource("recommender").recommend_by_mood(_required(params, "mood"), n, method)
+    return {"version": bundle.version, "results": results}
+
+
+def recommend_daily(bundle, params):
+    n = _int(params, "n", 6, MAX_RESULTS)
+    weighted = params.get("weighted", "0") in ("1", "true")
+    results = bundle.resource("recommender").daily_picks(n, params.get("mood"), weighted)
+    return {"version": bundle.version, "results": results}
+
+
+def recommend_song(bundle, params):
+    track_id = _required(params, "track_id")
+    if bundle.catalog.position(track_id) is None:
+        raise ApiError(404, f"track_id tidak ditemukan: {track_id}")
+    n = _int(params, "n", 10, MAX_RESULTS)
+    results = recommend_by_song(track_id, n, bundle=bundle, **_similarity_args(params))
+    return {"version": bundle.version, "track_id": track_id, "results": _records(results)}
+
+
+def _track_ids(params):
+    track_ids = params.get("track_ids")
+    if isinstance(track_ids, str):
+        track_ids = [t for t in track_ids.split(",") if t]
+    if not track_ids:
+        raise ApiError(400, "parameter 'track_ids' wajib diisi")
+    if len(track_ids) > MAX_SEEDS:
+        raise ApiError(400, f"maksimal {MAX_SEEDS} track_ids per request")
+    return [str(t) for t in track_ids]
+
+
+def recommend_songs(bundle, params):
+    track_ids = _track_ids(params)
+    n = _int(params, "n", 10, MAX_RESULTS)
+
+    out = recommend_by_songs(track_ids, n, bundle=bundle, **_similarity_args(params))
+    results = {t: [] for t in track_ids}
+    if len(out):
+        for seed, group in out.groupby("seed_track_id", sort=False):
+            results[seed] = _records(group.drop(columns="seed_track_id"))
+    return {"version": bundle.version, "results": results}
+
+
+def recommend_playlist(bundle, params):
+    track_ids = _track_ids(params)
+    weights = params.get("weights")
+    if weights is not None:
+        try:
+            weights = [float(w) for w in (weights.split(",") if isinstance(weights, str) else weights)]
+        except (TypeError, ValueError):
+            raise ApiError(400, "'weights' harus daftar angka")
+        if len(weights) != len(track_ids) or min(weights) < 0:
+            raise ApiError(400, "'weights' harus sepanjang 'track_ids' dan tidak negatif")
+    n = _int(params, "n", 10, MAX_RESULTS)
+    results = recommend_by_seeds(track_ids, n, bundle=bundle, weights=weights)
+    return {"version": bundle.version, "track_ids": track_ids, "results": _records(results)}
+
+
+def search(bundle, params):
+    limit = _int(params, "limit", 10, MAX_RESULTS)
+    positions = bundle.resource("search").search(_required(params, "q"), limit=limit)
+    return {"version": bundle.version, "results": _records(bundle.catalog.take(positions))}
+
+
+ROUTES = {
+    "/health": health,
+    "/moods": moods,
+    "/recommend/mood": recommend_mood,
+    "/recommend/daily": recommend_daily,
+    "/recommend/song": recommend_song,
+    "/recommend/songs": recommend_songs,
+    "/recommend/playlist": recommend_playlist,
+    "/search": search,
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MoodTuneAPI/1.0"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload):
+        body = json.dumps(_clean(payload), ensure_ascii=False, default=str).encode("utf-8")
+        self._send_body(status, body, "application/json; charset=utf-8")
+
+    def _send_body(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, params):
+        path = urlparse(self.path).path.rstrip("/") or "/"
+        if path == "/metrics":
+            return self._send_body(200, perf.recorder.to_prometheus().encode("utf-8"),
+                                   "text/plain; version=0.0.4; charset=utf-8")
+        if path == "/metrics.json":
+            return self._send_body(200, perf.recorder.to_json().encode("utf-8"),
+                                   "application/json; charset=utf-8")
+        route = ROUTES.get(path)
+        try:
+            if route is None:
+                raise ApiError(404, "endpoint tidak ditemukan")
+            # bundle diambil sekali per request (versi konsisten selama request)
+            bundle = get_bundle()
+            if bundle is None:
+                raise ApiError(503, "model belum tersedia")
+            with perf.span(f"api{path}"):
+                payload = route(bundle, params)
+            self._send(200, payload)
+        except ApiError as e:
+            self._send(e.status, {"error": str(e)})
+        except Exception as e:
+            print(f"Error: {self.path}: {e!r}")
+            self._send(500, {"error": "internal error"})
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        self._handle({k: v[-1] for k, v in query.items()})
+
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0 or length > MAX_BODY:
+            # body tidak dibaca -> koneksi keep-alive harus ditutup agar sisa
+            # body tidak diparse sebagai request berikutnya
+            self.close_connection = True
+            if length < 0:
+                return self._send(400, {"error": "Content-Length tidak valid"})
+            return self._send(413, {"error": "body terlalu besar"})
+        try:
+            params = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(params, dict):
+                raise ValueError
+        except ValueError:
+            return self._send(400, {"error": "body harus objek JSON"})
+        try:
+            params = _json_params(params)
+        except ApiError as e:
+            return self._send(e.status, {"error": str(e)})
+        self._handle(params)
+
+def serve(host="127.0.0.1", port=8000):
+    # muat model sebelum menerima request pertama
+    bundle = get_bundle()
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    print(f"MoodTune API di http://{host}:{server.server_port} (model {bundle.version if bundle else '-'})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP API rekomendasi MoodTune")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    serve(args.host, args.port)
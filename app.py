@@ -1,18 +1,43 @@
 import streamlit as st
-import pandas as pd
 import os
+import time
+import pandas as pd
 
 # recommender.py
-from recommender import Recommender
-rec = Recommender()
+from recommender import RANKING_METHODS, Recommender
 
 # utils/recommender.py
-from utils.recommender import recommend_by_song
-from utils.ui_components import sidebar_header, header, music_card
+from utils.recommender import (
+    GENRE_WEIGHT, SAME_GENRE, SessionProfile, get_bundle, recommend_by_profile, recommend_by_song,
+    register_resource,
+)
+from utils.ui_components import sidebar_header, header, music_card, music_cards
+
+# utils/perf.py
+from utils import perf
 
 # JUDUL HALAMAN
 st.set_page_config(page_title="MoodTune", page_icon="🎧", layout="wide")
 
+
+# MODEL AKTIF: katalog, indeks & Recommender dimuat sekali per versi dan dipakai
+# semua sesi; versi baru (train_knn / update_catalog) dimuat di latar lalu ditukar.
+register_resource("recommender", lambda b: Recommender(catalog=b.catalog, version=b.version))
+
+# durasi rerun dicatat per halaman (lihat panel Performa di halaman Dataset)
+rerun_start = time.perf_counter()
+
+# diambil sekali per rerun -> seluruh halaman memakai versi yang sama
+bundle = get_bundle()
+
+
+def load_recommender():
+    return bundle.resource("recommender")
+
+
+def load_catalog():
+    return bundle.catalog if bundle is not None else None
+
 # LOAD CSS
 css_path = "static/style.css"
 if os.path.exists(css_path):
@@ -24,6 +49,9 @@ if "page" not in st.session_state:
     st.session_state.page = "Beranda"
 if "selected_track_id" not in st.session_state:
     st.session_state.selected_track_id = None
+# lagu yang dipilih selama sesi -> profil untuk rekomendasi sesi
+if "session_profile" not in st.session_state:
+    st.session_state.session_profile = SessionProfile()
 
 
 # SIDEBAR
@@ -63,12 +91,9 @@ if page == "Beranda":
     st.subheader("🎶 Rekomendasi Acak Hari Ini")
     st.write("Merekomendasikan lagu acak - KNN Model.")
 
-    # Load data untuk sampling (dari data KNN)
-    df_knn_home = pd.read_csv("models/indexed_tracks.csv")
-
-    sample = df_knn_home.sample(6)
-    for _, r in sample.iterrows():
-        st.markdown(music_card(r), unsafe_allow_html=True)
+    # Set acak harian (seragam) dihitung sekali per hari & dibagi semua pengguna
+    sample = load_recommender().daily_picks(6)
+    st.markdown(music_cards(sample), unsafe_allow_html=True)
 
 
 # MUSIC RECOMMENDER (Sistem Ranking)
@@ -76,17 +101,18 @@ elif page == "Rekomendasi Mood":
     st.header("Pilih Mood untuk Rekomendasi Lagu")
     st.write("Merekomendasikan lagu yang paling **Populer** atau memiliki kombinasi **Valence & Energy** tertinggi untuk mood tersebut.")
 
+    rec = load_recommender()
     mood = st.selectbox("Pilih mood", rec.get_moods())
     jumlah = st.slider("Jumlah lagu", 5, 50, 10)
-    method = st.selectbox("Metode ranking", ["popularity", "valence & energy", "random"])
+    method = st.selectbox("Metode ranking", list(RANKING_METHODS), format_func=lambda m: RANKING_METHODS[m][0])
 
     if st.button("Tampilkan 🎵"):
         with st.spinner("Mengambil lagu terbaik..."):
             # PANGGIL SISTEM RANKING
             results = rec.recommend_by_mood(mood, jumlah, method)
 
-        for item in results:
-            st.markdown(music_card(item), unsafe_allow_html=True)
+        # satu blok HTML untuk semua kartu, embed dimuat saat diklik
+        st.markdown(music_cards(results), unsafe_allow_html=True)
 
 
 # LAGU SERUPA (Sistem KNN Murni)
@@ -94,11 +120,9 @@ elif page == "Temukan Lagu Serupa":
     st.header("🎧 Temukan Lagu yang Mirip")
     st.write("Fitur ini menggunakan model **K-Nearest Neighbors** untuk menemukan 10 lagu yang memiliki fitur audio (seperti *valence* & *energy*) paling mirip dengan lagu yang Anda pilih.")
 
-    # Load data KNN untuk pencarian
-    try:
-        # Load ulang untuk menghindari masalah scope
-        df_knn = pd.read_csv("models/indexed_tracks.csv")
-    except FileNotFoundError:
+    # Data KNN untuk pencarian (katalog bersama)
+    catalog = load_catalog()
+    if catalog is None:
         st.error("File 'indexed_tracks.csv' tidak ditemukan di folder 'models/'.")
         st.stop()
         
@@ -111,9 +135,8 @@ elif page == "Temukan Lagu Serupa":
     search_term = st.text_input("Ketik nama lagu atau artis...", key="song_search", placeholder="Contoh: Vigilante Man atau Ed Sheeran")
 
     if search_term:
-        # Cari lagu berdasarkan nama (case-insensitive)
-        results_df = df_knn[df_knn['track_name'].str.contains(search_term, case=False, na=False) | 
-                            df_knn['artist_name'].str.contains(search_term, case=False, na=False)]
+        # Cari lagu berdasarkan nama/artis (indeks pencarian, literal & case-insensitive)
+        results_df = catalog.take(bundle.resource("search").search(search_term, limit=10))
 
         if results_df.empty:
             st.warning(f"Tidak ada lagu yang ditemukan dengan nama/artis '{search_term}'.")
@@ -121,7 +144,7 @@ elif page == "Temukan Lagu Serupa":
             st.subheader("Pilih lagu Anda:")
             
             # Tampilkan hasil pencarian
-            for index, row in results_df.head(10).iterrows(): # Batasi 10 hasil
+            for index, row in results_df.iterrows(): # Maks 10 hasil, urut popularitas
                 col1, col2 = st.columns([0.8, 0.2])
                 with col1:
                     st.write(f"**{row['track_name']}** - *{row['artist_name']}*")
@@ -129,6 +152,7 @@ elif page == "Temukan Lagu Serupa":
                     # Buat tombol untuk setiap lagu
                     if st.button(f"Pilih", key=row['track_id']):
                         st.session_state.selected_track_id = row['track_id']
+                        st.session_state.session_profile.add(row['track_id'], bundle=bundle)
                         st.session_state.search_reset_flag = False # Set flag agar tidak reset setelah pilih
                         st.rerun() # Rerun untuk menampilkan rekomendasi
                         
@@ -137,24 +161,38 @@ elif page == "Temukan Lagu Serupa":
         
         selected_id = st.session_state.selected_track_id
         
-        # Ambil data lagu asli
-        original_song = df_knn[df_knn['track_id'] == selected_id]
-        if not original_song.empty:
-            original_song = original_song.iloc[0]
+        # Ambil data lagu asli (lookup indeks track_id, tanpa scan kolom)
+        pos = catalog.position(selected_id)
+        if pos is not None:
+            original_song = catalog.take([pos]).iloc[0]
         
             st.divider()
             st.subheader(f"Lagu Pilihan Anda:")
-            st.markdown(music_card(original_song), unsafe_allow_html=True)
+            st.markdown(music_card(original_song, lazy=False), unsafe_allow_html=True)
 
             st.subheader("🎶 Rekomendasi Lagu Serupa (KNN):")
-            
+
+            # Filter opsional: hanya mood tertentu / genre utama yang sama
+            col_mood, col_genre, col_mode = st.columns(3)
+            with col_mood:
+                filter_mood = st.selectbox("Batasi mood", ["Semua"] + catalog.moods(), key="similar_mood")
+            with col_genre:
+                same_genre = st.checkbox("Hanya genre yang sama", key="similar_same_genre")
+            with col_mode:
+                # audio + genre: kandidat audio diurutkan ulang dengan kemiripan genre
+                use_genre = st.checkbox("Perhitungkan kemiripan genre", key="similar_genre_mode")
+
             # PANGGIL FUNGSI KNN ANDA
             with st.spinner("Mencari lagu serupa..."):
-                recommendations = recommend_by_song(selected_id, top_n=10)
+                recommendations = recommend_by_song(
+                    selected_id, top_n=10, bundle=bundle,
+                    mood=None if filter_mood == "Semua" else filter_mood,
+                    genre=SAME_GENRE if same_genre else None,
+                    genre_weight=GENRE_WEIGHT if use_genre else 0.0,
+                )
 
             if not recommendations.empty:
-                for _, r in recommendations.iterrows():
-                    st.markdown(music_card(r), unsafe_allow_html=True)
+                st.markdown(music_cards(recommendations), unsafe_allow_html=True)
             else:
                 st.warning("Tidak dapat menemukan rekomendasi untuk lagu ini.")
                 
@@ -167,6 +205,31 @@ elif page == "Temukan Lagu Serupa":
             st.session_state.selected_track_id = None # Hapus ID jika lagu tidak ditemukan
             st.rerun()
 
+    # REKOMENDASI SESI: satu pencarian dari profil semua lagu yang sudah dipilih
+    profile = st.session_state.session_profile
+    if len(profile) >= 2:
+        st.divider()
+        st.subheader(f"🎚️ Rekomendasi dari Sesi Anda ({len(profile)} lagu dipilih)")
+
+        with st.expander("Lagu di sesi ini"):
+            session_songs = catalog.take([p for p in map(catalog.position, profile.track_ids) if p is not None])
+            for _, row in session_songs.iterrows():
+                col1, col2 = st.columns([0.8, 0.2])
+                with col1:
+                    st.write(f"**{row['track_name']}** - *{row['artist_name']}*")
+                with col2:
+                    if st.button("Hapus", key=f"session_remove_{row['track_id']}"):
+                        profile.remove(row['track_id'], bundle=bundle)
+                        st.rerun()
+            if st.button("Kosongkan sesi"):
+                profile.clear()
+                st.rerun()
+
+        with st.spinner("Menyusun rekomendasi sesi..."):
+            session_recs = recommend_by_profile(profile, top_n=10, bundle=bundle)
+        if not session_recs.empty:
+            st.markdown(music_cards(session_recs), unsafe_allow_html=True)
+
 
 # ABOUT (Penjelasan Teknologi)
 elif page == "Tentang":
@@ -194,34 +257,60 @@ elif page == "Dataset":
     st.header("Analisis Dataset")
     st.write("Bagian ini menampilkan statistik dan distribusi dataset yang digunakan dalam sistem MoodTune.")
 
-    # Load DataFrames
-    df_knn = None
-    df_rank = None
-    
-    try:
-        df_knn = pd.read_csv("models/indexed_tracks.csv")
-    except FileNotFoundError:
+    catalog = load_catalog()
+    if catalog is None:
         st.error("File 'models/indexed_tracks.csv' (Data KNN) tidak ditemukan.")
 
-    # Ringkasan Dataset
-    if df_knn is not None:
+    # Ringkasan Dataset: dari metadata kolom katalog (tanpa membuat DataFrame penuh
+    # per proses, supaya halaman mmap tetap dibagi antar worker)
+    if catalog is not None:
         st.subheader("Dataset (indexed_tracks.csv)")
         st.write("Dataset yang digunakan.")
 
         col_size, col_features = st.columns(2)
         with col_size:
-            st.metric("Jumlah Lagu", len(df_knn))
+            st.metric("Jumlah Lagu", len(catalog))
         with col_features:
-            st.metric("Jumlah Fitur", len(df_knn.columns))
+            st.metric("Jumlah Fitur", len(catalog.columns))
 
         st.markdown("---")
         
         # Menampilkan Distribusi Mood
         st.subheader("Distribusi Mood (Data KNN)")
 
-        # Distribusi mood: menggunakan bar chart
-        st.bar_chart(df_knn["mood"].value_counts())
+        # Distribusi mood: menggunakan bar chart (jumlah posisi per mood)
+        mood_counts = pd.Series({m: len(pos) for m, pos in catalog.group_positions("mood").items()}, dtype=int)
+        st.bar_chart(mood_counts.sort_values(ascending=False))
 
         if st.checkbox("Tampilkan Preview KNN Dataset", key='chk_knn_preview'):
             st.subheader("Preview 5 Baris Dataset KNN")
-            st.dataframe(df_knn.head())
+            st.dataframe(catalog.take(range(min(5, len(catalog)))))
+
+    # PERFORMA (utils/perf.py): latency per operasi sejak proses dimulai
+    st.markdown("---")
+    st.subheader("Performa")
+    st.write("Jumlah panggilan & latency per operasi (persentil dari 2048 sampel terakhir per operasi).")
+
+    ops = perf.recorder.snapshot()
+    if ops:
+        st.dataframe([{"operasi": name, **row} for name, row in ops.items()], use_container_width=True)
+    elif not perf.recorder.enabled:
+        st.info("Instrumentasi dimatikan (MOODTUNE_PERF=0).")
+    else:
+        st.info("Belum ada operasi yang tercatat.")
+
+    collectors = perf.recorder.collect()
+    if collectors:
+        st.write("Cache & klien Spotify:")
+        st.json(collectors)
+
+    col_json, col_prom, col_reset = st.columns(3)
+    with col_json:
+        st.download_button("Unduh JSON", perf.recorder.to_json(indent=2), "moodtune-perf.json", "application/json")
+    with col_prom:
+        st.download_button("Unduh Prometheus", perf.recorder.to_prometheus(), "moodtune-perf.prom", "text/plain")
+    with col_reset:
+        if st.button("Reset statistik"):
+            perf.recorder.reset()
+
+perf.record(f"app.page.{page}", time.perf_counter() - rerun_start)
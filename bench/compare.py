@@ -0,0 +1,77 @@
+# bench/compare.py
+# Membandingkan dua hasil bench/run.py dan menandai regresi:
+#
+#   python bench/compare.py lama.json baru.json --threshold 0.2
+#
+# Exit code 1 bila ada metrik yang memburuk lebih dari threshold (relatif).
+import sys
+import json
+import argparse
+
+# Metrik "lebih kecil lebih baik" (waktu, memori) vs "lebih besar lebih baik"
+LOWER_SUFFIXES = ("_ms", "seconds", "_mb")
+HIGHER_SUFFIXES = ("_per_s",)
+# Metrik sangat kecil berisik; selisih absolut di bawah ini diabaikan
+MIN_DELTA = {"_ms": 0.05, "seconds": 0.05, "_mb": 5.0, "_per_s": 0.0}
+
+
+def flatten(obj, prefix=""):
+    out = {}
+    for key, value in obj.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            out.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            out[name] = float(value)
+    return out
+
+
+def _direction(name):
+    if name.endswith(HIGHER_SUFFIXES):
+        return 1, next(s for s in HIGHER_SUFFIXES if name.endswith(s))
+    if name.endswith(LOWER_SUFFIXES):
+        return -1, next(s for s in LOWER_SUFFIXES if name.endswith(s))
+    return 0, None
+
+
+def compare(old, new, threshold=0.2):
+    """List (metrik, lama, baru, perubahan relatif, regresi?) untuk metrik yang ada di keduanya."""
+    a, b = flatten(old["stages"]), flatten(new["stages"])
+    rows = []
+    for name in sorted(a.keys() & b.keys()):
+        direction, suffix = _direction(name)
+        if not direction or a[name] <= 0:
+            continue
+        change = (b[name] - a[name]) / a[name]
+        worse = -change * direction > threshold and abs(b[name] - a[name]) > MIN_DELTA[suffix]
+        rows.append((name, a[name], b[name], change, worse))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bandingkan dua hasil benchmark MoodTune")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="perubahan relatif yang dianggap regresi (default 0.2 = 20%%)")
+    parser.add_argument("--all", action="store_true", help="tampilkan semua metrik, bukan hanya regresi")
+    args = parser.parse_args()
+
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    for key in ("tracks", "index", "precompute_k", "queries"):
+        if old["meta"]["args"].get(key) != new["meta"]["args"].get(key):
+            print(f"Peringatan: argumen '{key}' berbeda ({old['meta']['args'].get(key)} vs "
+                  f"{new['meta']['args'].get(key)}), hasil tidak sebanding penuh.")
+
+    rows = compare(old, new, args.threshold)
+    regressions = [r for r in rows if r[4]]
+    for name, a, b, change, worse in rows:
+        if worse or args.all:
+            print(f"{'REGRESI' if worse else '       '} {name:<55} {a:>12.3f} -> {b:>12.3f} ({change:+.1%})")
+    print(f"\n{len(regressions)} regresi dari {len(rows)} metrik "
+          f"({(old['meta'].get('git_commit') or '-')[:8]} -> {(new['meta'].get('git_commit') or '-')[:8]})")
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,386 @@
+# bench/run.py
+# Benchmark jalur utama MoodTune pada katalog sintetis (bench/synthetic.py):
+#
+#   python bench/run.py --tracks 100000
+#   python bench/run.py --tracks 1000000 --index ivf --precompute-k 50
+#   python bench/compare.py bench/results/lama.json bench/results/baru.json
+#
+# Stage berat (generate, data_prep, train_knn, load) dijalankan di proses anak
+# (fork) agar waktu & memori puncaknya terukur terpisah; latency rekomendasi &
+# pencarian diukur di proses utama. Hasil disimpan sebagai JSON di
+# bench/results/.
+import io
+import os
+import sys
+import json
+import time
+import pickle
+import shutil
+import random
+import argparse
+import platform
+import resource
+import tempfile
+import traceback
+import subprocess
+from contextlib import redirect_stdout
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.join(BENCH_DIR, "..")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, BENCH_DIR)
+import synthetic
+
+# ru_maxrss: KB di Linux, byte di macOS
+RSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+# UTILITIES
+def _rss_mb():
+    """RSS proses saat ini (MB); fallback ke ru_maxrss bila /proc tidak ada."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return _maxrss_mb()
+
+
+def _maxrss_mb(who=resource.RUSAGE_SELF):
+    return resource.getrusage(who).ru_maxrss * RSS_UNIT / 2**20
+
+
+def _summary(seconds):
+    """Ringkasan latency (ms) dari daftar durasi per panggilan (detik)."""
+    ms = np.asarray(seconds, dtype=np.float64) * 1000
+    if not len(ms):
+        return {"n": 0}
+    return {
+        "n": int(len(ms)),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+    }
+
+
+def _time_calls(fn, calls):
+    times = []
+    for args in calls:
+        t = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - t)
+    return _summary(times)
+
+
+def isolated(fn, *args):
+    """
+    Jalankan stage `fn(*args)` di proses anak (fork) dan kembalikan dict
+    hasilnya ditambah memori puncak stage itu: peak_rss_mb = ru_maxrss anak
+    dikurangi RSS saat fork (halaman warisan induk tidak ikut terhitung).
+    Proses worker milik stage (mis. data_prep --workers) dilaporkan terpisah
+    sebagai worker_peak_rss_mb (puncak absolut worker terbesar).
+    """
+    if not hasattr(os, "fork"):
+        start = _rss_mb()
+        result = fn(*args)
+        return {**result, "peak_rss_mb": None, "rss_start_mb": start}
+
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(r)
+        code = 0
+        try:
+            start = _rss_mb()
+            with redirect_stdout(io.StringIO()):
+                result = fn(*args)
+            workers = _maxrss_mb(resource.RUSAGE_CHILDREN)
+            result.update(
+                peak_rss_mb=_maxrss_mb() - start,
+                worker_peak_rss_mb=workers or None,
+            )
+            payload = pickle.dumps((result, None))
+        except BaseException:
+            payload = pickle.dumps((None, traceback.format_exc()))
+            code = 1
+        with os.fdopen(w, "wb") as f:
+            f.write(payload)
+        os._exit(code)
+
+    os.close(w)
+    with os.fdopen(r, "rb") as f:
+        data = f.read()
+    os.waitpid(pid, 0)
+    result, error = pickle.loads(data) if data else (None, "proses anak berhenti tanpa hasil")
+    if error:
+        raise RuntimeError(f"Stage {fn.__name__} gagal:\n{error}")
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _meta(args):
+    import sklearn
+    import scipy
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+        "scipy": scipy.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "args": vars(args),
+    }
+
+
+# STAGE (proses anak)
+def stage_generate(catalog_csv, raw_dir, n, n_prep, seed):
+    t = time.perf_counter()
+    synthetic.write_catalog(catalog_csv, n, seed)
+    catalog_seconds = time.perf_counter() - t
+    t = time.perf_counter()
+    if n_prep:
+        synthetic.write_raw(raw_dir, n_prep, seed)
+    return {
+        "catalog_seconds": catalog_seconds,
+        "raw_seconds": time.perf_counter() - t,
+        "catalog_mb": os.path.getsize(catalog_csv) / 2**20,
+    }
+
+
+def stage_data_prep(raw_dir, out_dir, n, workers):
+    from data_prep import data_prep as dp
+    dp.TRACKS_CSV = os.path.join(raw_dir, "tracks.csv")
+    dp.ARTISTS_CSV = os.path.join(raw_dir, "artists.csv")
+    dp.OUT_MOOD = os.path.join(out_dir, "spotify_mood_dataset.csv")
+    dp.OUT_CLEAN = os.path.join(out_dir, "music_clean.csv")
+
+    t = time.perf_counter()
+    dp.build_dataset(workers=workers)
+    seconds = time.perf_counter() - t
+    return {
+        "seconds": seconds,
+        "rows_in": n,
+        "rows_per_s": n / seconds,
+        "workers": workers,
+    }
+
+
+def stage_train(catalog_csv, model_dir, backend, index_params, precompute_k, jobs):
+    from models import train_knn as tk
+    tk.INPUT_PATH = catalog_csv
+    tk.BASE_DIR = model_dir
+
+    t = time.perf_counter()
+    tk.train_knn(backend, index_params, recall_queries=0, precompute_k=precompute_k, n_jobs=jobs)
+    return {"seconds": time.perf_counter() - t, "backend": backend, "precompute_k": precompute_k}
+
+
+def stage_load(model_dir):
+    from recommender import Recommender
+    from utils.artifacts import current_version, resolve_model_dir
+    from utils.catalog import load_catalog
+    from utils.recommender import ModelBundle
+    from utils.search import get_search_index
+    version_dir = resolve_model_dir(model_dir)
+
+    t = time.perf_counter()
+    catalog = load_catalog(version_dir)
+    catalog_seconds = time.perf_counter() - t
+
+    t = time.perf_counter()
+    bundle = ModelBundle(version_dir, current_version(model_dir))
+    bundle_seconds = time.perf_counter() - t
+
+    # indeks tetangga dimuat lazy (pertama dipakai), diukur terpisah
+    t = time.perf_counter()
+    bundle.index
+    index_seconds = time.perf_counter() - t
+
+    t = time.perf_counter()
+    Recommender(catalog=bundle.catalog)
+    recommender_seconds = time.perf_counter() - t
+
+    t = time.perf_counter()
+    get_search_index(bundle.catalog)
+    search_seconds = time.perf_counter() - t
+
+    return {
+        "n_tracks": len(catalog),
+        "catalog_seconds": catalog_seconds,
+        "bundle_seconds": bundle_seconds,
+        "index_seconds": index_seconds,
+        "recommender_init_seconds": recommender_seconds,
+        "search_index_seconds": search_seconds,
+    }
+
+
+# STAGE LATENCY (proses utama, bundle sudah dimuat)
+def bench_mood(bundle, queries, top_n):
+    from recommender import RANKING_METHODS, Recommender
+    from utils.cache import TTLCache
+
+    rec = Recommender(catalog=bundle.catalog)
+    moods = rec.get_moods() or [None]
+    calls = [(moods[i % len(moods)], top_n) for i in range(queries)]
+
+    out = {}
+    for method in RANKING_METHODS:
+        t = time.perf_counter()
+        rec.recommend_by_mood(moods[0], top_n, method)
+        first = time.perf_counter() - t
+
+        # maxsize=0: setiap panggilan miss (mengukur jalur tanpa cache)
+        rec.cache = TTLCache(maxsize=0)
+        uncached = _time_calls(lambda m, n: rec.recommend_by_mood(m, n, method), calls)
+        rec.cache = TTLCache(maxsize=1024)
+        for m in moods:
+            rec.recommend_by_mood(m, top_n, method)
+        cached = _time_calls(lambda m, n: rec.recommend_by_mood(m, n, method), calls)
+        out[method] = {"first_call_ms": first * 1000, "uncached": uncached, "cached": cached}
+    return out
+
+
+def bench_song(bundle, queries, top_n, seed):
+    import utils.recommender as ur
+    from utils.cache import TTLCache
+
+    rng = np.random.default_rng(seed)
+    ids = bundle.catalog.columns["track_id"]
+    seeds = [ids[i] for i in rng.integers(0, len(bundle.catalog), queries)]
+    calls = [(t, top_n) for t in seeds]
+    song = lambda t, n: ur.recommend_by_song(t, n, bundle=bundle)
+
+    saved = ur.result_cache
+    try:
+        ur.result_cache = TTLCache(maxsize=0)
+        out = {"uncached": _time_calls(song, calls)}
+
+        # top_n melebihi K tabel -> pencarian live lewat indeks
+        table = bundle.neighbor_table
+        if table is not None:
+            k = table[0].shape[1]
+            out["live"] = _time_calls(song, [(t, k + 1) for t in seeds[:max(1, queries // 10)]])
+
+        ur.result_cache = TTLCache(maxsize=queries + 1)
+        for args in calls:
+            song(*args)
+        out["cached"] = _time_calls(song, calls)
+    finally:
+        ur.result_cache = saved
+    return out
+
+
+def search_queries(catalog, per_class, seed):
+    """Query per jenis: 1-2 huruf, kata, prefiks/judul penuh, nama artis, tidak cocok."""
+    rng = random.Random(seed)
+    rows = catalog.take([rng.randrange(len(catalog)) for _ in range(per_class)])
+    titles = [str(t) for t in rows["track_name"]]
+    return {
+        "one_char": [rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(per_class)],
+        "two_char": [rng.choice(synthetic.WORDS)[:2] for _ in range(per_class)],
+        "word": [rng.choice(synthetic.WORDS) for _ in range(per_class)],
+        "prefix": [t[:6] for t in titles],
+        "title": titles,
+        "artist": [str(a) for a in rows["artist_name"]],
+        "miss": ["qzxv" + str(i) for i in range(per_class)],
+    }
+
+
+def bench_search(bundle, per_class, limit, seed):
+    index = bundle.resource("search")
+    out = {}
+    for kind, queries in search_queries(bundle.catalog, per_class, seed).items():
+        out[kind] = _time_calls(lambda q: index.search(q, limit=limit), [(q,) for q in queries])
+    return out
+
+
+# MAIN
+def run(args):
+    workdir = args.workdir or tempfile.mkdtemp(prefix="moodtune-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    catalog_csv = os.path.join(workdir, "music_clean.csv")
+    raw_dir = os.path.join(workdir, "raw")
+    prep_dir = os.path.join(workdir, "prep")
+    model_dir = os.path.join(workdir, "models")
+    os.makedirs(prep_dir, exist_ok=True)
+    os.makedirs(model_dir, exist_ok=True)
+
+    n_prep = args.tracks if args.prep_tracks is None else args.prep_tracks
+    params = {"n_lists": args.n_lists, "n_probe": args.n_probe}
+    params = {k: v for k, v in params.items() if v is not None}
+
+    report = {"meta": _meta(args), "stages": {}}
+    stages = report["stages"]
+
+    def step(name, fn, *fn_args):
+        print(f"[{name}] ...", flush=True)
+        t = time.perf_counter()
+        stages[name] = fn(*fn_args)
+        print(f"[{name}] selesai dalam {time.perf_counter() - t:.2f} s", flush=True)
+
+    try:
+        step("generate", isolated, stage_generate, catalog_csv, raw_dir, args.tracks, n_prep, args.seed)
+        if n_prep:
+            step("data_prep", isolated, stage_data_prep, raw_dir, prep_dir, n_prep, args.workers)
+        step("train_knn", isolated, stage_train, catalog_csv, model_dir,
+             args.index, params, args.precompute_k, args.jobs)
+        step("load", isolated, stage_load, model_dir)
+
+        from utils.artifacts import current_version, resolve_model_dir
+        from utils.recommender import ModelBundle
+        rss = _rss_mb()
+        bundle = ModelBundle(resolve_model_dir(model_dir), current_version(model_dir))
+        bundle.warm()
+        stages["serving_rss_mb"] = _rss_mb() - rss
+
+        step("recommend_by_mood", bench_mood, bundle, args.queries, args.top_n)
+        step("recommend_by_song", bench_song, bundle, args.queries, args.top_n, args.seed)
+        step("search", bench_search, bundle, max(1, args.queries // 10), args.top_n, args.seed)
+    finally:
+        if not args.keep and not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)) if args.output else RESULTS_DIR, exist_ok=True)
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"bench-{time.strftime('%Y%m%d-%H%M%S')}-{args.tracks}.json"
+    )
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print("Hasil benchmark:", output)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark MoodTune pada katalog sintetis")
+    parser.add_argument("--tracks", type=int, default=100_000, help="ukuran katalog (10k - 5M)")
+    parser.add_argument("--prep-tracks", type=int,
+                        help="jumlah lagu mentah untuk data_prep (default = --tracks, 0 = lewati)")
+    parser.add_argument("--workers", type=int, default=1, help="worker data_prep")
+    parser.add_argument("--index", default="brute", help="backend indeks train_knn")
+    parser.add_argument("--n-lists", type=int, help="ivf: jumlah sel k-means")
+    parser.add_argument("--n-probe", type=int, help="ivf: sel yang diperiksa per query")
+    parser.add_argument("--precompute-k", type=int, default=0, help="tabel top-K tetangga (0 = tidak)")
+    parser.add_argument("--jobs", type=int, default=-1, help="proses untuk tabel tetangga")
+    parser.add_argument("--queries", type=int, default=1000, help="jumlah query per pengukuran latency")
+    parser.add_argument("--top-n", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="folder kerja (default: folder sementara, dihapus setelah selesai)")
+    parser.add_argument("--keep", action="store_true", help="jangan hapus folder kerja sementara")
+    parser.add_argument("--output", help="path file JSON hasil (default: bench/results/bench-<waktu>-<n>.json)")
+    run(parser.parse_args())
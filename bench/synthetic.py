@@ -0,0 +1,161 @@
+import os
+import argparse
+import numpy as np
+import pandas as pd
+
+# Kosakata untuk judul lagu & nama artis sintetis (pencarian butuh kata yang berulang)
+WORDS = [
+    "love", "night", "dance", "heart", "summer", "blue", "fire", "rain", "dream", "baby",
+    "song", "light", "city", "home", "wild", "gold", "river", "star", "moon", "road",
+    "time", "girl", "boy", "sky", "sweet", "lost", "young", "forever", "tonight", "world",
+    "cinta", "malam", "hujan", "rindu", "senja", "bintang", "hati", "jalan", "lagu", "mimpi",
+    "corazón", "noche", "amor", "vida", "sol", "über", "liebe", "été", "café", "niño",
+]
+GENRES = [
+    "pop", "dance pop", "rock", "hard rock", "metal", "jazz", "lofi", "acoustic",
+    "folk", "hip hop", "rap", "classical", "piano", "edm", "indie", "r&b", "soul",
+    "blues", "country", "k-pop", "dangdut", "latin",
+]
+MOODS = ["Happy", "Sad", "Calm", "Energetic", "Neutral", "Serious"]
+
+CHUNK = 500_000
+
+
+def _titles(rng, n):
+    counts = rng.integers(1, 5, n)
+    idx = rng.integers(0, len(WORDS), (n, 4))
+    words = np.array(WORDS, dtype=object)
+    titles = [" ".join(words[idx[i, :counts[i]]]).title() for i in range(n)]
+    # sebagian judul punya nomor/remix agar mirip data asli
+    for i in np.flatnonzero(rng.random(n) < 0.1):
+        titles[i] += f" ({rng.integers(1, 99)} Remix)"
+    return titles
+
+
+def _genre_lists(rng, n):
+    counts = rng.integers(0, 4, n)
+    idx = rng.integers(0, len(GENRES), (n, 3))
+    return [str([GENRES[j] for j in idx[i, :counts[i]]]) for i in range(n)]
+
+
+def artist_names(n_artists, seed=0):
+    rng = np.random.default_rng(seed)
+    words = np.array(WORDS, dtype=object)
+    idx = rng.integers(0, len(WORDS), (n_artists, 2))
+    return [f"{words[a].title()} {words[b].title()} {i}" for i, (a, b) in enumerate(idx)]
+
+
+def _artist_picks(rng, n, n_artists):
+    # popularitas artis berekor panjang (Zipf): sedikit artis punya banyak lagu
+    return np.minimum(rng.zipf(1.3, n) - 1, n_artists - 1)
+
+
+def catalog_frame(n, seed=0, start=0, n_artists=None):
+    """
+    `n` lagu sintetis berformat data/music_clean.csv (skema indexed_tracks +
+    popularity). `start` = nomor lagu pertama (untuk ditulis per chunk).
+    """
+    rng = np.random.default_rng([seed, start])
+    n_artists = n_artists or max(100, n // 20)
+    names = np.array(artist_names(n_artists, seed), dtype=object)
+    return pd.DataFrame({
+        "track_id": [f"syn{i:010d}" for i in range(start, start + n)],
+        "track_name": _titles(rng, n),
+        "artist_name": names[_artist_picks(rng, n, n_artists)],
+        "genres": _genre_lists(rng, n),
+        "mood": np.array(MOODS, dtype=object)[rng.integers(0, len(MOODS), n)],
+        "valence": rng.random(n),
+        "energy": rng.random(n),
+        "danceability": rng.random(n),
+        "tempo": rng.uniform(50, 210, n),
+        "popularity": np.round(rng.beta(2, 5, n) * 100),
+    })
+
+
+def write_catalog(path, n, seed=0, chunk=CHUNK):
+    """Tulis katalog sintetis ke CSV per chunk (memori tetap kecil untuk jutaan lagu)."""
+    n_artists = max(100, n // 20)
+    for start in range(0, n, chunk):
+        df = catalog_frame(min(chunk, n - start), seed, start, n_artists)
+        df.to_csv(path, mode="w" if start == 0 else "a", header=start == 0, index=False)
+    return path
+
+
+def write_raw(directory, n, seed=0, chunk=CHUNK):
+    """
+    Dataset mentah untuk data_prep: tracks.csv & artists.csv dengan kolom
+    seperti dump Kaggle (artists berupa string list Python, ~5% fitur kosong,
+    ~3% lagu duplikat).
+    """
+    os.makedirs(directory, exist_ok=True)
+    n_artists = max(100, n // 20)
+    rng = np.random.default_rng(seed)
+    names = artist_names(n_artists, seed)
+    pd.DataFrame({
+        "id": [f"art{i:08d}" for i in range(n_artists)],
+        "name": names,
+        "genres": _genre_lists(rng, n_artists),
+        "popularity": rng.integers(0, 100, n_artists),
+        "followers": rng.integers(0, 10_000_000, n_artists).astype(float),
+    }).to_csv(os.path.join(directory, "artists.csv"), index=False)
+
+    tracks_path = os.path.join(directory, "tracks.csv")
+    for start in range(0, n, chunk):
+        m = min(chunk, n - start)
+        rng = np.random.default_rng([seed, start, 1])
+        main = _artist_picks(rng, m, n_artists)
+        feat = rng.integers(0, n_artists, m)
+        has_feat = rng.random(m) < 0.2
+        artists = [
+            str([names[a], names[b]]) if f else str([names[a]])
+            for a, b, f in zip(main, feat, has_feat)
+        ]
+
+        def feature(low=0.0, high=1.0):
+            x = rng.uniform(low, high, m)
+            x[rng.random(m) < 0.05] = np.nan
+            return x
+
+        titles = _titles(rng, m)
+        # duplikat judul+artis (diuji oleh dedup data_prep)
+        dup = np.flatnonzero(rng.random(m) < 0.03)
+        for i in dup[dup > 0]:
+            titles[i], artists[i] = titles[i - 1], artists[i - 1]
+
+        pd.DataFrame({
+            "id": [f"trk{i:010d}" for i in range(start, start + m)],
+            "name": titles,
+            "popularity": np.round(rng.beta(2, 5, m) * 100).astype(int),
+            "duration_ms": rng.integers(90_000, 420_000, m),
+            "explicit": rng.integers(0, 2, m),
+            "artists": artists,
+            "id_artists": [f"['art{a:08d}']" for a in main],
+            "release_date": rng.integers(1950, 2024, m).astype(str),
+            "danceability": feature(),
+            "energy": feature(),
+            "key": rng.integers(0, 12, m),
+            "loudness": rng.uniform(-30, 0, m),
+            "mode": rng.integers(0, 2, m),
+            "speechiness": feature(),
+            "acousticness": feature(),
+            "instrumentalness": feature(),
+            "liveness": feature(),
+            "valence": feature(),
+            "tempo": feature(50, 210),
+            "time_signature": 4,
+        }).to_csv(tracks_path, mode="w" if start == 0 else "a", header=start == 0, index=False)
+    return directory
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generator dataset sintetis MoodTune")
+    parser.add_argument("--tracks", type=int, default=100_000, help="jumlah lagu (10k - 5M)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--catalog", help="tulis katalog (format music_clean.csv) ke path ini")
+    parser.add_argument("--raw", help="tulis tracks.csv & artists.csv mentah ke folder ini")
+    args = parser.parse_args()
+
+    if args.catalog:
+        print("Katalog:", write_catalog(args.catalog, args.tracks, args.seed))
+    if args.raw:
+        print("Dataset mentah:", write_raw(args.raw, args.tracks, args.seed))
@@ -1,5 +1,10 @@
 import os
+import re
 import ast
+import time
+import argparse
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 import numpy as np
 
@@ -41,6 +46,43 @@ def extract_artist_from_tracks(value):
     return value
 
 
+# List Python berisi string (hasil str(list)), elemen pertama ditangkap di grup 1/2
+_QUOTED = r"""(?:'(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")"""
+ARTIST_LIST_RE = re.compile(
+    r"""^\[\s*(?:'((?:[^'\\]|\\.)*)'|"((?:[^"\\]|\\.)*)")"""
+    r"""(?:\s*,\s*""" + _QUOTED + r""")*\s*,?\s*\]$"""
+)
+
+
+def extract_artists_column(values):
+    """
+    Versi kolom extract_artist_from_tracks tanpa ast.literal_eval per baris:
+    elemen pertama list diambil dengan regex, sisanya split koma. Baris yang
+    tidak jelas (escape, format aneh) tetap memakai fungsi aslinya.
+    """
+    s = pd.Series(values)
+    out = s.copy()
+    is_str = s.map(type) == str
+    text = s[is_str]
+    if text.empty:
+        return out
+
+    listlike = text.str.contains("['", regex=False) | text.str.contains('["', regex=False)
+    first = text[listlike].str.extract(ARTIST_LIST_RE)
+    first = first[0].fillna(first[1])
+    parsed = first.notna() & ~first.str.contains("\\", regex=False, na=False)
+    out.loc[parsed[parsed].index] = first[parsed]
+
+    # list yang tidak bisa diparse regex -> fungsi asli (hasil persis sama)
+    slow = parsed[~parsed].index
+    out.loc[slow] = text.loc[slow].map(extract_artist_from_tracks)
+
+    plain = text[~listlike]
+    comma = plain.str.contains(",", regex=False)
+    out.loc[comma[comma].index] = plain[comma].str.split(",", n=1).str[0].str.strip()
+    return out
+
+
 # LOAD ARTISTS
 def load_artists():
     cols = preview_columns(ARTISTS_CSV)
@@ -51,64 +93,219 @@ def load_artists():
     return artists
 
 
+class ArtistLookup:
+    """
+    Tabel artis yang di-key sekali (pd.Index + get_indexer) dan dipakai ulang
+    untuk setiap chunk, menggantikan merge per chunk. Satu artis per key:
+    jika nama/ID muncul lebih dari sekali, baris pertama di artists.csv yang
+    dipakai (sama dengan baris yang dulu lolos dedup setelah merge fan-out).
+    """
+
+    def __init__(self, artists):
+        self.artists = artists
+        self._tables = {}
+
+    def _table(self, key):
+        if key not in self._tables:
+            table = self.artists.dropna(subset=[key]).drop_duplicates(subset=[key], keep="first")
+            # baris kosong di akhir untuk track tanpa pasangan (posisi -1)
+            table = pd.concat([table, table.iloc[:0].reindex([0])], ignore_index=True)
+            self._tables[key] = (pd.Index(table[key].iloc[:-1]), table)
+        return self._tables[key]
+
+    def join(self, chunk, left_on, key):
+        """Left join `chunk[left_on]` ke kolom artis `key` (maks satu match per track)."""
+        index, table = self._table(key)
+        pos = index.get_indexer(chunk[left_on])
+        pos[pos < 0] = len(table) - 1
+
+        matched = table.iloc[pos].reset_index(drop=True)
+        if left_on == key:
+            matched = matched.drop(columns=[key])
+        matched = matched.rename(columns={c: f"{c}_artist" for c in matched.columns if c in chunk.columns})
+        matched.index = chunk.index
+        return pd.concat([chunk, matched], axis=1)
+
+
 # CLEANING TRACKS (CHUNK-BASED)
-def process_chunks():
-    artists = load_artists()
+TRACK_COLUMNS = [
+    "id", "name", "artists", "artist_id", "album_name", "release_date",
+    "popularity", "duration_ms", "danceability", "energy", "loudness",
+    "speechiness", "acousticness", "instrumentalness", "liveness",
+    "valence", "tempo", "uri"
+]
+
+# Kolom penting setelah join dengan artis
+KEEP_COLUMNS = [
+    "track_id", "track_name", "album_name", "release_date", "popularity",
+    "duration_ms", "danceability", "energy", "loudness", "speechiness",
+    "acousticness", "instrumentalness", "liveness", "valence", "tempo", "uri",
+    "artist_name", "genres"
+]
+
+# Input classify_moods yang harus ada (diisi NaN bila tidak ada di tracks.csv)
+MOOD_INPUTS = ["valence", "energy", "danceability", "acousticness", "tempo"]
+
+
+def clean_chunk(chunk, artists):
+    """Normalisasi satu chunk tracks.csv lalu gabungkan dengan data artis (ArtistLookup)."""
+    # Normalisasi kolom
+    chunk = chunk.rename(columns={"id": "track_id", "name": "track_name"})
+
+    # Jika tidak ada artist_id, pakai parsing kolom "artists"
+    if "artist_id" not in chunk.columns and "artists" in chunk.columns:
+        chunk["artist_key"] = extract_artists_column(chunk["artists"])
+        merged = artists.join(chunk, left_on="artist_key", key="artist_name")
+    else:
+        merged = artists.join(chunk, left_on="artist_id", key="artist_id")
+
+    # Pilih kolom penting
+    keep = [c for c in KEEP_COLUMNS if c in merged.columns]
+    return merged[keep].dropna(subset=["track_name"])
+
+
+def transform_chunk(chunk, artists):
+    """Bersihkan + join artis + label mood untuk satu chunk (tanpa state global)."""
+    clean = clean_chunk(chunk, artists)
+
+    # Pastikan kolom numeric ada
+    missing = {c: np.nan for c in MOOD_INPUTS if c not in clean.columns}
+    if missing:
+        clean = clean.assign(**missing)
+
+    # Tambahkan mood
+    return clean.assign(mood=classify_moods(clean))
+
+
+# PROSES PARALEL (tiap worker menerima data artis sekali lewat initializer)
+_worker_artists = None
+
+
+def _init_worker(artists):
+    global _worker_artists
+    _worker_artists = artists
+
+
+def _transform_in_worker(chunk):
+    t = time.perf_counter()
+    out = transform_chunk(chunk, _worker_artists)
+    return out, len(chunk), time.perf_counter() - t
+
+
+class StageStats:
+    """Akumulasi baris & detik per tahap untuk laporan throughput."""
+
+    def __init__(self):
+        self.rows = defaultdict(int)
+        self.seconds = defaultdict(float)
+
+    def add(self, stage, rows, seconds):
+        self.rows[stage] += rows
+        self.seconds[stage] += seconds
+
+    def report(self, wall):
+        print("\nThroughput per tahap:")
+        for stage in self.rows:
+            sec = self.seconds[stage]
+            print(f"  {stage:<10} {self.rows[stage]:>10} baris  {sec:8.2f} s  "
+                  f"{self.rows[stage] / max(sec, 1e-9):>12,.0f} baris/s")
+        total = self.rows.get("read", 0)
+        print(f"  {'total':<10} {total:>10} baris  {wall:8.2f} s  {total / max(wall, 1e-9):>12,.0f} baris/s (wall)")
+
+
+def iter_transformed_chunks(workers=1, stats=None):
+    """
+    Baca tracks.csv per CHUNK_SIZE baris dan hasilkan chunk yang sudah bersih
+    + berlabel mood, urutan sama dengan file input. Dengan workers > 1 chunk
+    ditransformasi paralel di process pool (maks 2 chunk antre per worker).
+    """
+    stats = stats or StageStats()
+    artists = ArtistLookup(load_artists())
 
     # Kolom penting yang akan diekstrak dari tracks.csv
     track_cols = preview_columns(TRACKS_CSV)
-    want = [
-        "id", "name", "artists", "artist_id", "album_name", "release_date",
-        "popularity", "duration_ms", "danceability", "energy", "loudness",
-        "speechiness", "acousticness", "instrumentalness", "liveness",
-        "valence", "tempo", "uri"
-    ]
-    want = [c for c in want if c in track_cols]
-
+    want = [c for c in TRACK_COLUMNS if c in track_cols]
     print("Membaca kolom:", want)
 
-    first_write = True
-    total_rows = 0
-
-    for chunk in pd.read_csv(TRACKS_CSV, usecols=want, chunksize=CHUNK_SIZE):
-        
-        # Normalisasi kolom
-        chunk = chunk.rename(columns={"id": "track_id", "name": "track_name"})
-
-        # Jika tidak ada artist_id, pakai parsing kolom "artists"
-        if "artist_id" not in chunk.columns and "artists" in chunk.columns:
-            chunk["artist_key"] = chunk["artists"].apply(extract_artist_from_tracks)
-            merged = chunk.merge(
-                artists, left_on="artist_key", right_on="artist_name",
-                how="left", suffixes=("", "_artist")
-            )
-        else:
-            merged = chunk.merge(artists, on="artist_id", how="left")
-
-        # Pilih kolom penting
-        keep = [
-            "track_id", "track_name", "album_name", "release_date", "popularity",
-            "duration_ms", "danceability", "energy", "loudness", "speechiness",
-            "acousticness", "instrumentalness", "liveness", "valence", "tempo", "uri",
-            "artist_name", "genres"
-        ]
-        keep = [c for c in keep if c in merged.columns]
-
-        clean = merged[keep].dropna(subset=["track_name"])
-
-        # Tulis ke file sementara
-        clean.to_csv(
-            OUT_CLEAN,
-            mode="w" if first_write else "a",
-            index=False,
-            header=first_write
-        )
-
-        first_write = False
-        total_rows += len(clean)
-        print(f"{total_rows} baris ditulis...")
-
-    print(f"Cleaning selesai. Total baris: {total_rows}")
+    def read_chunks():
+        reader = pd.read_csv(TRACKS_CSV, usecols=want, chunksize=CHUNK_SIZE)
+        while True:
+            t = time.perf_counter()
+            chunk = next(reader, None)
+            if chunk is None:
+                return
+            stats.add("read", len(chunk), time.perf_counter() - t)
+            yield chunk
+
+    if workers <= 1:
+        for chunk in read_chunks():
+            t = time.perf_counter()
+            out = transform_chunk(chunk, artists)
+            stats.add("transform", len(chunk), time.perf_counter() - t)
+            yield out
+        return
+
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(artists,)) as pool:
+        pending = deque()
+
+        def collect():
+            out, rows, seconds = pending.popleft().result()
+            stats.add("transform", rows, seconds)
+            return out
+
+        for chunk in read_chunks():
+            pending.append(pool.submit(_transform_in_worker, chunk))
+            if len(pending) >= 2 * workers:
+                yield collect()
+        while pending:
+            yield collect()
+
+
+# DEDUP STREAMING
+class HashedKeySet:
+    """
+    Himpunan hash 64-bit (8 byte per key) untuk dedup lintas chunk.
+
+    Disimpan sebagai beberapa run array terurut; run yang ukurannya mirip
+    digabung (gaya LSM) sehingga jumlah run tetap O(log n) dan lookup cukup
+    searchsorted per run.
+    """
+
+    def __init__(self):
+        self.runs = []
+
+    def __len__(self):
+        return sum(len(r) for r in self.runs)
+
+    def add_new(self, keys):
+        """
+        Mask baris `keys` yang belum pernah terlihat (kemunculan pertama di
+        batch ini), lalu masukkan key baru ke himpunan.
+        """
+        keys = np.asarray(keys, dtype=np.uint64)
+        uniq, first = np.unique(keys, return_index=True)
+        new = np.ones(len(uniq), dtype=bool)
+        for run in self.runs:
+            pos = np.minimum(np.searchsorted(run, uniq), len(run) - 1)
+            new &= run[pos] != uniq
+
+        mask = np.zeros(len(keys), dtype=bool)
+        mask[first[new]] = True
+        self._add(uniq[new])
+        return mask
+
+    def _add(self, sorted_keys):
+        if not len(sorted_keys):
+            return
+        self.runs.append(sorted_keys)
+        while len(self.runs) > 1 and len(self.runs[-2]) <= 2 * len(self.runs[-1]):
+            last = self.runs.pop()
+            self.runs[-1] = np.sort(np.concatenate([self.runs[-1], last]))
+
+
+def dedup_keys(df, subset):
+    """Hash 64-bit stabil per baris atas kolom `subset`."""
+    return pd.util.hash_pandas_object(df[subset], index=False).to_numpy()
 
 
 # MOOD CLASSIFICATION
@@ -168,42 +365,190 @@ def classify_mood(row):
 
 
 
-# BUILD FINAL DATASET
-def build_dataset():
-    print("Menggabungkan file sementara")
-    df = pd.read_csv(OUT_CLEAN)
+# MOOD CLASSIFICATION (VEKTORISASI)
+# Grup genre untuk koreksi, urutan = prioritas (sama dengan rantai elif classify_mood)
+GENRE_GROUPS = [
+    ["metal", "rock", "punk"],
+    ["jazz", "lofi", "indie", "acoustic", "ambient"],
+    ["hip hop", "rap", "trap"],
+    ["classical", "piano", "instrumental"],
+    ["sad", "emo", "ballad"],
+    ["pop", "dance", "disco"],
+]
 
-    # Hilangkan duplikat
-    df = df.drop_duplicates(subset=["track_name", "artist_name"])
 
-    # Pastikan kolom numeric ada
-    for c in ["valence", "energy", "danceability", "acousticness", "tempo"]:
-        if c not in df.columns:
-            df[c] = np.nan
+def _genre_flags(genres, n):
+    """
+    Flag keyword genre per baris. Pengecekan substring hanya dilakukan sekali
+    per string genres unik, lalu disebar ke baris lewat kode factorize.
+    """
+    if genres is None:
+        codes, uniques = np.zeros(n, dtype=np.int64), [""]
+    else:
+        codes, uniques = pd.factorize(genres, use_na_sentinel=False)
+    uniques = [str(g).lower() for g in uniques]
 
-    # Tambahkan mood
-    print("Mengklasifikasikan mood...")
-    df["mood"] = df.apply(classify_mood, axis=1)
+    def flag(keywords):
+        per_unique = np.array([any(k in g for k in keywords) for g in uniques], dtype=bool)
+        return per_unique[codes]
 
-    # Simpan versi lengkap
-    df.to_csv(OUT_MOOD, index=False)
-    print("Simpan:", OUT_MOOD)
+    return flag
 
-    # Simpan versi ringkas
-    small_cols = [
-        "track_id", "track_name", "artist_name", "genres",
-        "popularity", "valence", "energy", "danceability",
-        "tempo", "mood", "uri"
+
+def classify_moods(df):
+    """
+    Versi vektor classify_mood untuk seluruh DataFrame (hasil label identik),
+    memakai mask boolean NumPy + np.select alih-alih df.apply per baris.
+    """
+    n = len(df)
+
+    def col(name):
+        if name in df.columns:
+            return pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=float)
+        return np.full(n, np.nan)
+
+    valence, energy = col("valence"), col("energy")
+    dance, acoustic = col("danceability"), col("acousticness")
+    flag = _genre_flags(df["genres"] if "genres" in df.columns else None, n)
+
+    # Fallback (valence/energy kosong)
+    fallback = np.select(
+        [flag(["acoustic"]) | (acoustic > 0.6), flag(["rock", "metal"]), flag(["pop"]) & (dance > 0.6)],
+        ["Calm", "Energetic", "Happy"],
+        default="Neutral",
+    )
+
+    # Core Rules
+    mood = np.select(
+        [
+            (valence > 0.65) & (energy > 0.6),
+            (valence < 0.4) & (energy < 0.5),
+            (energy > 0.7) & (valence >= 0.4) & (valence <= 0.65),
+            (energy < 0.5) & (acoustic > 0.5),
+        ],
+        ["Happy", "Sad", "Energetic", "Calm"],
+        default="Neutral",
+    ).astype(object)
+
+    # Genre Corrections: hanya grup pertama yang cocok yang berlaku
+    matched = np.zeros(n, dtype=bool)
+    corrections = [
+        (energy > 0.6, "Energetic"),
+        (energy < 0.6, "Calm"),
+        (valence < 0.5, "Serious"),
+        (np.ones(n, dtype=bool), "Calm"),
+        (np.ones(n, dtype=bool), "Sad"),
+        ((valence > 0.6) & (energy > 0.6), "Happy"),
     ]
-    small_cols = [c for c in small_cols if c in df.columns]
+    for keywords, (condition, label) in zip(GENRE_GROUPS, corrections):
+        in_group = flag(keywords) & ~matched
+        mood[in_group & condition] = label
+        matched |= in_group
+
+    missing = np.isnan(valence) | np.isnan(energy)
+    mood[missing] = fallback[missing]
+    return mood
 
-    df[small_cols].to_csv(os.path.join(DATA_DIR, "music_clean.csv"), index=False)
-    print("Simpan: music_clean.csv")
 
+def verify_mood_classifier(df, sample=100_000, seed=0):
+    """
+    Bandingkan classify_moods dengan classify_mood (per baris) pada sampel
+    data + kasus tepi sintetis; cetak waktu keduanya. Return True jika identik.
+    """
+    if len(df) > sample:
+        df = df.sample(sample, random_state=seed)
+    edge = pd.DataFrame({
+        "valence": [np.nan, np.nan, np.nan, 0.65, 0.4, 0.66, 0.3, 0.5, np.nan],
+        "energy": [0.5, np.nan, 0.2, 0.7, 0.71, 0.61, 0.6, np.nan, np.nan],
+        "danceability": [0.7, 0.7, np.nan, 0.5, 0.5, 0.5, 0.5, 0.9, 0.1],
+        "acousticness": [0.1, 0.7, np.nan, 0.6, 0.1, 0.1, 0.9, 0.1, np.nan],
+        "genres": ["['dance pop']", np.nan, "['metal']", "['indie rock']", "['trap']",
+                   "['piano']", "['emo rap']", "['pop']", ""],
+    })
+    df = pd.concat([df, edge], ignore_index=True)
+
+    t = time.perf_counter()
+    expected = df.apply(classify_mood, axis=1).to_numpy()
+    t_apply = time.perf_counter() - t
+
+    t = time.perf_counter()
+    got = classify_moods(df)
+    t_vector = time.perf_counter() - t
+
+    mismatch = int((expected != got).sum())
+    print(f"{len(df)} baris | apply: {t_apply:.3f}s | vektor: {t_vector:.3f}s "
+          f"({t_apply / max(t_vector, 1e-9):.1f}x) | beda label: {mismatch}")
+    return mismatch == 0
+
+
+
+# BUILD FINAL DATASET (STREAMING)
+SMALL_COLUMNS = [
+    "track_id", "track_name", "artist_name", "genres",
+    "popularity", "valence", "energy", "danceability",
+    "tempo", "mood", "uri"
+]
+
+
+def build_dataset(workers=1, chunks=None):
+    """
+    Pipeline streaming: setiap chunk hasil iter_transformed_chunks (paralel
+    bila workers > 1) di-dedup (track_name, artist_name) lewat HashedKeySet
+    oleh satu writer, lalu ditulis bertahap ke spotify_mood_dataset.csv
+    (lengkap) dan music_clean.csv (ringkas) dengan urutan input.
+    Memori puncak dibatasi ukuran chunk + 8 byte per lagu unik.
+    """
+    stats = StageStats()
+    if chunks is None:
+        chunks = iter_transformed_chunks(workers, stats)
+
+    wall = time.perf_counter()
+    seen = HashedKeySet()
+    columns = None
+    total_in = total_out = 0
+
+    for clean in chunks:
+        total_in += len(clean)
+
+        # Hilangkan duplikat (lintas chunk, kemunculan pertama dipertahankan)
+        t = time.perf_counter()
+        rows = len(clean)
+        clean = clean[seen.add_new(dedup_keys(clean, ["track_name", "artist_name"]))]
+        stats.add("dedup", rows, time.perf_counter() - t)
+
+        t = time.perf_counter()
+        first_write = columns is None
+        if first_write:
+            columns = list(clean.columns)
+            small_cols = [c for c in SMALL_COLUMNS if c in columns]
+        clean = clean.reindex(columns=columns)
+
+        mode = "w" if first_write else "a"
+        clean.to_csv(OUT_MOOD, mode=mode, index=False, header=first_write)
+        clean[small_cols].to_csv(OUT_CLEAN, mode=mode, index=False, header=first_write)
+        stats.add("write", len(clean), time.perf_counter() - t)
+
+        total_out += len(clean)
+        print(f"{total_out} baris unik ditulis ({total_in} dibaca)...")
+
+    print("Simpan:", OUT_MOOD)
+    print("Simpan: music_clean.csv")
+    stats.report(time.perf_counter() - wall)
     print("\nDataset final berhasil dibuat!")
 
 
 # MAIN
 if __name__ == "__main__":
-    process_chunks()
-    build_dataset()
+    parser = argparse.ArgumentParser(description="Persiapan dataset MoodTune")
+    parser.add_argument("--verify-mood", type=int, metavar="N",
+                        help="hanya cek kesetaraan & waktu classify_moods vs classify_mood pada N baris")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="jumlah proses untuk transformasi chunk (default 1 = sekuensial)")
+    args = parser.parse_args()
+
+    if args.verify_mood:
+        source = OUT_MOOD if os.path.exists(OUT_MOOD) else OUT_CLEAN
+        ok = verify_mood_classifier(pd.read_csv(source, nrows=args.verify_mood), args.verify_mood)
+        raise SystemExit(0 if ok else 1)
+
+    build_dataset(workers=args.workers)
@@ -1,6 +1,8 @@
 import os
+import sys
+import argparse
+import numpy as np
 import pandas as pd
-from sklearn.neighbors import NearestNeighbors
 from sklearn.preprocessing import StandardScaler
 import joblib
 
@@ -9,14 +11,34 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, "..", "data")
 
 INPUT_PATH = os.path.join(DATA_DIR, "music_clean.csv")
-MODEL_PATH = os.path.join(BASE_DIR, "knn_model.pkl")
-SCALER_PATH = os.path.join(BASE_DIR, "scaler.pkl")
-INDEXED_PATH = os.path.join(BASE_DIR, "indexed_tracks.csv")
+
+sys.path.insert(0, os.path.join(BASE_DIR, ".."))
+from utils.artifacts import (
+    INDEX_FILE, INDEXED_CSV_FILE, NEIGHBORS_DIST_FILE, NEIGHBORS_IDX_FILE, SCALED_FILE, SCALER_FILE,
+    KEEP_VERSIONS, current_version, new_version_dir, prune_versions, publish,
+)
+from utils.catalog import CATALOG_DIRNAME, Catalog, save_catalog
+from utils.search import build_search_index
+from utils.genres import build_genre_matrix
+from utils.neighbors import BACKENDS, build_index, precompute_neighbors, recall_report, save_index
 
 # FITUR YANG ADA DI DATA KAMU
 FEATURES = ["valence", "energy", "danceability", "tempo", "popularity"]
 
-def train_knn():
+def train_knn(backend="brute", index_params=None, recall_queries=1000, precompute_k=0, n_jobs=-1,
+              keep=KEEP_VERSIONS):
+    # Semua artefak ditulis ke folder versi baru (models/versions/<versi>/),
+    # lalu diaktifkan di akhir lewat models/CURRENT
+    version, out_dir = new_version_dir(BASE_DIR)
+    index_path = os.path.join(out_dir, INDEX_FILE)
+    scaler_path = os.path.join(out_dir, SCALER_FILE)
+    indexed_path = os.path.join(out_dir, INDEXED_CSV_FILE)
+    scaled_path = os.path.join(out_dir, SCALED_FILE)
+    neighbors_idx_path = os.path.join(out_dir, NEIGHBORS_IDX_FILE)
+    neighbors_dist_path = os.path.join(out_dir, NEIGHBORS_DIST_FILE)
+    catalog_path = os.path.join(out_dir, CATALOG_DIRNAME)
+    print("Versi model:", version)
+
     print("Loading dataset")
     df = pd.read_csv(INPUT_PATH)
 
@@ -35,16 +57,36 @@ def train_knn():
     X_scaled = scaler.fit_transform(X)
 
     # Simpan scaler
-    joblib.dump(scaler, SCALER_PATH)
-    print("Scaler saved:", SCALER_PATH)
+    joblib.dump(scaler, scaler_path)
+    print("Scaler saved:", scaler_path)
+
+    # Simpan matriks fitur ter-scale (float32, urutan baris = indexed_tracks)
+    np.save(scaled_path, X_scaled.astype(np.float32))
+    print("Fitur ter-scale saved:", scaled_path)
 
-    # Train KNN
-    knn = NearestNeighbors(n_neighbors=10, metric="euclidean")
-    knn.fit(X_scaled)
+    # Bangun indeks tetangga (data tidak ikut dipickle, dipasang dari features_scaled.npy)
+    X_scaled = X_scaled.astype(np.float32)
+    index = build_index(X_scaled, backend, **(index_params or {}))
+    save_index(index, index_path)
+    print(f"Indeks KNN ({backend}) saved:", index_path)
 
-    # Simpan model
-    joblib.dump(knn, MODEL_PATH)
-    print("Model KNN saved:", MODEL_PATH)
+    # Laporan recall@10 terhadap brute force exact
+    report = None
+    if backend != "brute" and recall_queries:
+        report = recall_report(index, X_scaled, k=10, n_queries=recall_queries)
+        print(
+            f"Recall@{report['k']}: {report['recall']:.4f} | "
+            f"{report['index_ms_per_query']:.3f} ms/query "
+            f"(exact {report['exact_ms_per_query']:.3f} ms/query)"
+        )
+
+    # Tabel top-K tetangga: halaman "Temukan Lagu Serupa" cukup membaca satu baris
+    if precompute_k:
+        X_mmap = np.load(scaled_path, mmap_mode="r")
+        neighbors_idx, neighbors_dist = precompute_neighbors(index, X_mmap, precompute_k, n_jobs=n_jobs)
+        np.save(neighbors_idx_path, neighbors_idx)
+        np.save(neighbors_dist_path, neighbors_dist)
+        print(f"Tabel tetangga top-{neighbors_idx.shape[1]} saved:", neighbors_idx_path)
 
     # Simpan indexed tracks
     index_df = df[[
@@ -55,10 +97,55 @@ def train_knn():
         "mood"
     ] + available]
 
-    index_df.to_csv(INDEXED_PATH, index=False)
-    print("indexed_tracks.csv saved:", INDEXED_PATH)
+    index_df.to_csv(indexed_path, index=False)
+    print("indexed_tracks.csv saved:", indexed_path)
+
+    # Simpan katalog biner (memory-mapped saat serving, CSV tetap sebagai fallback)
+    save_catalog(index_df, catalog_path)
+    print("Katalog biner saved:", catalog_path)
+
+    # Indeks pencarian judul/artis (dibaca via mmap oleh app)
+    catalog = Catalog.from_binary(catalog_path)
+    build_search_index(catalog).save(catalog_path)
+    print("Indeks pencarian saved:", catalog_path)
+
+    # Genre diparse sekali -> vocab + matriks multi-hot CSR (kemiripan audio + genre)
+    genres = build_genre_matrix(catalog)
+    genres.save(catalog_path)
+    print(f"Matriks genre saved: {len(genres.vocab)} genre, {len(genres.indices)} entri")
+
+    # Aktifkan versi baru (app yang berjalan ikut memakainya)
+    publish(
+        version, out_dir, BASE_DIR,
+        parent=current_version(BASE_DIR), kind="train",
+        n_tracks=len(index_df), backend=backend, precompute_k=precompute_k,
+        recall=report["recall"] if report else None,
+    )
+    print("Versi aktif:", version)
+
+    removed = prune_versions(BASE_DIR, keep)
+    if removed:
+        print("Versi lama dihapus:", ", ".join(removed))
 
     print("\nTRAINING SELESAI TANPA ERROR!\n")
 
 if __name__ == "__main__":
-    train_knn()
+    parser = argparse.ArgumentParser(description="Training indeks KNN MoodTune")
+    parser.add_argument("--index", default="brute", choices=list(BACKENDS),
+                        help="backend indeks tetangga (default: brute)")
+    parser.add_argument("--n-lists", type=int, help="ivf: jumlah sel k-means")
+    parser.add_argument("--n-probe", type=int, help="ivf: sel yang diperiksa per query")
+    parser.add_argument("--leaf-size", type=int, help="kd/ball: ukuran daun pohon")
+    parser.add_argument("--recall-queries", type=int, default=1000,
+                        help="jumlah query untuk laporan recall@10 (0 = lewati)")
+    parser.add_argument("--precompute-k", type=int, default=0,
+                        help="simpan tabel top-K tetangga per lagu (0 = tidak)")
+    parser.add_argument("--jobs", type=int, default=-1,
+                        help="jumlah proses untuk tabel tetangga (-1 = semua core)")
+    parser.add_argument("--keep", type=int, default=KEEP_VERSIONS,
+                        help=f"jumlah folder versi yang disimpan (default: {KEEP_VERSIONS})")
+    args = parser.parse_args()
+
+    params = {"n_lists": args.n_lists, "n_probe": args.n_probe, "leaf_size": args.leaf_size}
+    params = {k: v for k, v in params.items() if v is not None}
+    train_knn(args.index, params, args.recall_queries, args.precompute_k, args.jobs, args.keep)
@@ -0,0 +1,132 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+import joblib
+
+# PATH CONFIG
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+sys.path.insert(0, os.path.join(BASE_DIR, ".."))
+from utils.artifacts import (
+    INDEX_FILE, NEIGHBORS_DIST_FILE, NEIGHBORS_IDX_FILE, SCALED_FILE, SCALER_FILE,
+    KEEP_VERSIONS, copy_artifact, current_version, new_version_dir, prune_versions, publish,
+    resolve_model_dir,
+)
+from utils.catalog import CATALOG_DIRNAME, FEATURES, append_catalog, load_catalog, normalize
+from utils.neighbors import BruteForceIndex, load_index, save_index, update_neighbors
+from utils.recommender import standardize
+from utils.search import SearchIndex, build_search_index
+from utils.genres import GenreMatrix, build_genre_matrix
+from data_prep.data_prep import classify_moods
+
+
+# UPDATE INKREMENTAL: lagu baru (CSV delta, format seperti data/music_clean.csv)
+# ditambahkan ke versi model aktif tanpa fit ulang scaler/indeks, lalu hasilnya
+# diterbitkan sebagai versi baru di models/versions/.
+def update_catalog(delta_path, keep=KEEP_VERSIONS):
+    t0 = time.perf_counter()
+    src_dir = resolve_model_dir(BASE_DIR)
+    parent = current_version(BASE_DIR)
+    print("Versi sumber:", parent or "models/ (belum berversi)")
+
+    catalog = load_catalog(src_dir)
+    scaler = joblib.load(os.path.join(src_dir, SCALER_FILE))
+    n_old = len(catalog)
+
+    # Lagu baru: mood diklasifikasi bila belum ada, fitur wajib lengkap
+    delta = pd.read_csv(delta_path)
+    if "mood" not in delta.columns:
+        delta["mood"] = classify_moods(delta)
+    elif delta["mood"].isna().any():
+        missing = delta["mood"].isna()
+        delta.loc[missing, "mood"] = classify_moods(delta[missing])
+    delta = normalize(delta).dropna(subset=FEATURES)
+
+    # track_id yang sudah ada di katalog (atau dobel di delta) dilewati
+    known = np.array([catalog.position(t) is not None for t in delta["track_id"]], dtype=bool)
+    delta = delta[~known & ~delta["track_id"].duplicated()].reset_index(drop=True)
+    print(f"Lagu baru: {len(delta)} (dilewati {int(known.sum())} yang sudah ada)")
+    if not len(delta):
+        print("Tidak ada yang perlu ditambahkan.")
+        return None
+
+    version, out_dir = new_version_dir(BASE_DIR)
+    copy_artifact(src_dir, out_dir, SCALER_FILE)
+
+    # Fitur ter-scale: baris lama + baris baru (scaler lama, tanpa fit ulang)
+    scaled_path = os.path.join(src_dir, SCALED_FILE)
+    X_old = np.load(scaled_path, mmap_mode="r") if os.path.exists(scaled_path) else None
+    if X_old is None or len(X_old) != n_old:
+        X_old = standardize(catalog.features, scaler)
+    X_new = standardize(delta[FEATURES].to_numpy(), scaler)
+    np.save(os.path.join(out_dir, SCALED_FILE), np.concatenate([X_old, X_new]).astype(np.float32))
+    X = np.load(os.path.join(out_dir, SCALED_FILE), mmap_mode="r")
+    print("Fitur ter-scale:", X.shape)
+
+    # Indeks tetangga: baris baru disisipkan (brute: langsung, ivf: ke sel terdekat, kd/ball: pohon dibangun ulang)
+    index_path = os.path.join(src_dir, INDEX_FILE)
+    index = load_index(index_path, X_old) if os.path.exists(index_path) else BruteForceIndex().attach(X_old)
+    index.extend(X)
+    save_index(index, os.path.join(out_dir, INDEX_FILE))
+    print(f"Indeks KNN ({index.name}) diperbarui")
+
+    # Tabel top-K: hanya baris yang tetangganya berubah yang ditulis ulang
+    precompute_k = 0
+    idx_path, dist_path = os.path.join(src_dir, NEIGHBORS_IDX_FILE), os.path.join(src_dir, NEIGHBORS_DIST_FILE)
+    if os.path.exists(idx_path) and os.path.exists(dist_path):
+        indices, distances = np.load(idx_path, mmap_mode="r"), np.load(dist_path, mmap_mode="r")
+        if len(indices) == n_old:
+            indices, distances, changed = update_neighbors(index, X, n_old, indices, distances)
+            np.save(os.path.join(out_dir, NEIGHBORS_IDX_FILE), indices)
+            np.save(os.path.join(out_dir, NEIGHBORS_DIST_FILE), distances)
+            precompute_k = indices.shape[1]
+            print(f"Tabel tetangga top-{precompute_k}: {changed} baris lama diperbarui")
+
+    # Katalog biner + indeks pencarian (posting lama dipetakan, bukan dibangun ulang)
+    catalog_dir = os.path.join(out_dir, CATALOG_DIRNAME)
+    new_catalog = append_catalog(catalog, delta, catalog_dir)
+    src_catalog = catalog.source if catalog.source and os.path.isdir(catalog.source) else None
+    if src_catalog and SearchIndex.exists(src_catalog):
+        search = SearchIndex.load(src_catalog).extend(
+            delta["track_name"].to_numpy(), delta["artist_name"].to_numpy(),
+            new_catalog.columns.get("popularity_track"),
+        )
+    else:
+        search = build_search_index(new_catalog)
+    search.save(catalog_dir)
+
+    # Matriks genre: baris baru disambung, vocab lama tetap (genre baru di belakang)
+    if src_catalog and GenreMatrix.exists(src_catalog):
+        genres = GenreMatrix.load(src_catalog).extend(
+            delta["genres"] if "genres" in delta.columns else [None] * len(delta)
+        )
+    else:
+        genres = build_genre_matrix(new_catalog)
+    genres.save(catalog_dir)
+    print("Katalog biner saved:", catalog_dir)
+
+    publish(
+        version, out_dir, BASE_DIR,
+        parent=parent, kind="update", source=os.path.abspath(delta_path),
+        n_tracks=len(new_catalog), n_added=len(delta), backend=index.name,
+        precompute_k=precompute_k,
+    )
+    print(f"Versi aktif: {version} ({time.perf_counter() - t0:.1f} s)")
+
+    # Retensi: tiap update menulis salinan katalog penuh, versi lama dibuang
+    removed = prune_versions(BASE_DIR, keep)
+    if removed:
+        print("Versi lama dihapus:", ", ".join(removed))
+    return version
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tambah lagu baru ke katalog MoodTune tanpa training ulang")
+    parser.add_argument("delta", help="CSV lagu baru (kolom seperti data/music_clean.csv)")
+    parser.add_argument("--keep", type=int, default=KEEP_VERSIONS,
+                        help=f"jumlah folder versi yang disimpan (default: {KEEP_VERSIONS})")
+    args = parser.parse_args()
+    update_catalog(args.delta, args.keep)
@@ -1,46 +1,106 @@
 # recommender.py
-import pandas as pd
+import numpy as np
+from utils.cache import TTLCache
+from utils.catalog import get_catalog
+from utils.perf import timed
+from utils.sampling import Sampler
+
+# Cache hasil per Recommender (= per versi katalog) untuk metode deterministik
+RESULT_CACHE_SIZE = 1024
+
+
+# RANKING: skor per lagu (lebih tinggi = lebih atas); None = kolom tidak tersedia
+def _popularity(columns):
+    if 'popularity_track' in columns:
+        return np.asarray(columns['popularity_track'], dtype=np.float32)
+    return None
+
+
+def _valence_energy(columns):
+    # rank by valence*energy
+    if 'valence' in columns and 'energy' in columns:
+        valence = np.nan_to_num(np.asarray(columns['valence'], dtype=np.float32))
+        energy = np.nan_to_num(np.asarray(columns['energy'], dtype=np.float32))
+        return valence * energy
+    return None
+
+
+# Key kanonik metode ranking -> (label UI, fungsi skor). Dipakai app.py dan Recommender;
+# scorer None (atau kolom tidak tersedia) berarti sampel acak.
+RANKING_METHODS = {
+    'popularity': ('popularity', _popularity),
+    'valence_energy': ('valence & energy', _valence_energy),
+    'random': ('random', None),
+}
+
 
 class Recommender:
-    def __init__(self, csv_path="models/indexed_tracks.csv"):
+    @timed("recommender.init")
+    def __init__(self, csv_path=None, catalog=None, version=None):
         self.csv_path = csv_path
-        self.df = pd.read_csv(csv_path, low_memory=False)
-        # normalize
-        if 'mood' in self.df.columns:
-            self.df['mood'] = self.df['mood'].astype(str).str.capitalize()
-        # ensure popularity column name
-        if 'popularity' in self.df.columns and 'popularity_track' not in self.df.columns:
-            self.df.rename(columns={'popularity':'popularity_track'}, inplace=True)
-        # create groups
-        self.groups = {m: g.reset_index(drop=True) for m, g in self.df.groupby('mood')}
+        # katalog bersama (sudah dinormalisasi: mood kapital, popularity_track);
+        # tanpa csv_path dipakai versi model aktif (format biner bila tersedia)
+        if catalog is None:
+            catalog = get_catalog(csv_path)
+        self.catalog = catalog
+        # posisi baris per mood
+        self.groups = catalog.group_positions('mood')
+        # sampling acak O(k) per mood (+ alias table popularitas & set harian)
+        self.sampler = Sampler(catalog, version)
+        # urutan ranking per (mood, metode), dihitung sekali saat load
+        self.rankings = {}
+        for method in RANKING_METHODS:
+            self._ranking(method)
+        # Recommender dibuat ulang untuk tiap versi model, jadi cache ikut terinvalidasi
+        self.cache = TTLCache(maxsize=RESULT_CACHE_SIZE)
+
+
+    def _ranking(self, method):
+        """Dict mood -> posisi terurut untuk `method` (None jika tidak bisa di-ranking)."""
+        if method not in self.rankings:
+            scorer = RANKING_METHODS.get(method, (None, None))[1]
+            scores = scorer(self.catalog.columns) if scorer is not None else None
+            if scores is None:
+                self.rankings[method] = None
+            else:
+                orders = {m: pos[np.argsort(-scores[pos], kind='stable')] for m, pos in self.groups.items()}
+                orders[None] = np.argsort(-scores, kind='stable')
+                self.rankings[method] = orders
+        return self.rankings[method]
 
 
     def get_moods(self):
-        return sorted(self.df['mood'].unique())
-    
+        return self.catalog.moods()
 
+
+    @timed("recommend.mood")
     def recommend_by_mood(self, mood, top_n=10, method='popularity'):
         mood = str(mood).capitalize()
-        if mood in self.groups:
-            df = self.groups[mood]
-        else:
-            df = self.df
-        if method == 'popularity' and 'popularity_track' in df.columns:
-            out = df.sort_values('popularity_track', ascending=False).head(top_n)
-        elif method == 'valence_energy':
-            # rank by valence*energy
-            if 'valence' in df.columns and 'energy' in df.columns:
-                df['score'] = df['valence'].fillna(0)*df['energy'].fillna(0)
-                out = df.sort_values('score', ascending=False).head(top_n)
-            else:
-                out = df.sample(min(top_n,len(df)))
-        else:
-            out = df.sample(min(top_n,len(df)))
-        return out.to_dict(orient='records')
-    
+        if mood not in self.groups:
+            mood = None
+        orders = self._ranking(method)
+        if orders is None:
+            # acak: tidak di-cache
+            return self.catalog.take(self.sampler.sample(top_n, mood)).to_dict(orient='records')
 
-    def sample_by_mood(self, mood, n=10):
+        key = (mood, method, top_n)
+        records = self.cache.get(key)
+        if records is None:
+            records = self.catalog.take(orders[mood][:top_n]).to_dict(orient='records')
+            self.cache.set(key, records)
+        return [dict(r) for r in records]
+
+
+    def sample_by_mood(self, mood, n=10, weighted=False):
+        """n lagu acak unik untuk mood (mood tak dikenal = seluruh katalog); weighted = berbobot popularitas."""
         mood = str(mood).capitalize()
-        if mood in self.groups:
-            return self.groups[mood].sample(min(n, len(self.groups[mood]))).to_dict(orient='records')
-        return self.df.sample(n).to_dict(orient='records')
+        positions = self.sampler.sample(n, mood if mood in self.groups else None, weighted)
+        return self.catalog.take(positions).to_dict(orient='records')
+
+
+    def daily_picks(self, n=6, mood=None, weighted=False):
+        """Set "lagu hari ini": sama untuk semua pengguna sepanjang hari (per versi katalog)."""
+        if mood is not None:
+            mood = str(mood).capitalize()
+            mood = mood if mood in self.groups else None
+        return self.catalog.take(self.sampler.daily(n, mood, weighted)).to_dict(orient='records')
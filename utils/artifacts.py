@@ -0,0 +1,126 @@
+import os
+import json
+import time
+import shutil
+
+# KONFIGURASI PATH
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_DIR = os.path.join(BASE_DIR, "..", "models")
+VERSIONS_DIR = os.path.join(MODEL_DIR, "versions")
+CURRENT_FILE = os.path.join(MODEL_DIR, "CURRENT")
+
+# Nama file artefak di dalam satu folder versi (atau folder models/ lama)
+SCALER_FILE = "scaler.pkl"
+SCALED_FILE = "features_scaled.npy"
+INDEX_FILE = "knn_index.pkl"
+NEIGHBORS_IDX_FILE = "neighbors_idx.npy"
+NEIGHBORS_DIST_FILE = "neighbors_dist.npy"
+INDEXED_CSV_FILE = "indexed_tracks.csv"
+MANIFEST_FILE = "manifest.json"
+
+# Jumlah folder versi yang disimpan (versi aktif & sebelumnya selalu disimpan)
+KEEP_VERSIONS = 5
+
+
+def current_version(model_dir=MODEL_DIR):
+    """Nama versi aktif (isi file CURRENT) atau None untuk layout lama."""
+    try:
+        with open(os.path.join(model_dir, "CURRENT")) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def resolve_model_dir(model_dir=MODEL_DIR):
+    """Folder artefak aktif: models/versions/<CURRENT>, atau models/ bila belum berversi."""
+    version = current_version(model_dir)
+    if version is None:
+        return model_dir
+    return os.path.join(model_dir, "versions", version)
+
+
+def new_version_dir(model_dir=MODEL_DIR):
+    """Buat folder versi baru (belum aktif). Return (version, path)."""
+    base = time.strftime("%Y%m%d-%H%M%S")
+    version, i = base, 1
+    while os.path.exists(os.path.join(model_dir, "versions", version)):
+        i += 1
+        version = f"{base}-{i}"
+    path = os.path.join(model_dir, "versions", version)
+    os.makedirs(path)
+    return version, path
+
+
+def list_versions(model_dir=MODEL_DIR):
+    """Nama folder versi di models/versions/, urut dari yang terlama."""
+    versions_dir = os.path.join(model_dir, "versions")
+    if not os.path.isdir(versions_dir):
+        return []
+    names = [v for v in os.listdir(versions_dir) if os.path.isdir(os.path.join(versions_dir, v))]
+    # "<tanggal>-<jam>" lalu "<tanggal>-<jam>-2", "-3", ... (lihat new_version_dir)
+    def key(name):
+        parts = name.split("-")
+        return parts[:2], int(parts[2]) if len(parts) > 2 and parts[2].isdigit() else 1
+    return sorted(names, key=key)
+
+
+def prune_versions(model_dir=MODEL_DIR, keep=KEEP_VERSIONS):
+    """
+    Hapus folder versi terlama sampai tersisa `keep` versi. Versi aktif dan
+    versi sebelumnya (parent di manifest) tidak pernah dihapus: worker yang
+    belum pindah versi masih bisa memuat artefaknya. Return versi yang dihapus.
+    """
+    current = current_version(model_dir)
+    protected = {current}
+    if current is not None:
+        protected.add(read_manifest(os.path.join(model_dir, "versions", current)).get("parent"))
+
+    versions = list_versions(model_dir)
+    removed = []
+    for version in versions[:max(len(versions) - max(keep, 1), 0)]:
+        if version in protected:
+            continue
+        shutil.rmtree(os.path.join(model_dir, "versions", version), ignore_errors=True)
+        removed.append(version)
+    return removed
+
+
+def read_manifest(version_dir):
+    path = os.path.join(version_dir, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def publish(version, version_dir, model_dir=MODEL_DIR, **info):
+    """
+    Tulis manifest.json lalu aktifkan versi dengan mengganti file CURRENT
+    secara atomik (os.replace); app yang berjalan membaca versi baru ini.
+    """
+    manifest = {
+        "version": version,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "files": sorted(os.listdir(version_dir)),
+        **info,
+    }
+    with open(os.path.join(version_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    tmp = os.path.join(model_dir, "CURRENT.tmp")
+    with open(tmp, "w") as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(model_dir, "CURRENT"))
+    return manifest
+
+
+def copy_artifact(src_dir, dst_dir, name):
+    """Salin artefak yang tidak berubah (hard link bila bisa, agar cepat & hemat disk)."""
+    src, dst = os.path.join(src_dir, name), os.path.join(dst_dir, name)
+    if not os.path.exists(src):
+        return False
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copyfile(src, dst)
+    return True
@@ -0,0 +1,136 @@
+import json
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Cache LRU in-memory dengan masa berlaku (TTL) per entri, aman dipakai
+    banyak thread. Entri kedaluwarsa dibuang saat dibaca; bila penuh, entri
+    yang paling lama tidak dipakai dibuang lebih dulu. ttl=None = tanpa batas.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self.misses += 1
+                return default
+            value, expires = item
+            if expires is not None and expires <= self.clock():
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=_MISSING):
+        ttl = self.ttl if ttl is _MISSING else ttl
+        expires = self.clock() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_many(self, keys):
+        """Dict key -> value untuk key yang ada (dan belum kedaluwarsa)."""
+        found = {}
+        for key in keys:
+            value = self.get(key, _MISSING)
+            if value is not _MISSING:
+                found[key] = value
+        return found
+
+    def set_many(self, items, ttl=_MISSING):
+        for key, value in items.items():
+            self.set(key, value, ttl)
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
+
+
+class DiskCache:
+    """
+    Cache TTL persisten di SQLite (nilai disimpan sebagai JSON), agar hasil
+    tetap ada setelah proses restart dan bisa dibagi beberapa worker.
+    """
+
+    def __init__(self, path, ttl=None):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT, expires REAL)"
+            )
+
+    def get_many(self, keys):
+        keys = [str(k) for k in keys]
+        found = {}
+        now = time.time()
+        # SQLite membatasi jumlah parameter per query
+        for s in range(0, len(keys), 500):
+            part = keys[s:s + 500]
+            marks = ",".join("?" * len(part))
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT key, value, expires FROM cache WHERE key IN ({marks})", part
+                ).fetchall()
+            for key, value, expires in rows:
+                if expires is None or expires > now:
+                    found[key] = json.loads(value)
+        return found
+
+    def get(self, key, default=None):
+        return self.get_many([key]).get(str(key), default)
+
+    def set_many(self, items, ttl=_MISSING):
+        ttl = self.ttl if ttl is _MISSING else ttl
+        expires = time.time() + ttl if ttl is not None else None
+        rows = [(str(k), json.dumps(v), expires) for k, v in items.items()]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO cache VALUES (?, ?, ?)", rows)
+
+    def set(self, key, value, ttl=_MISSING):
+        self.set_many({key: value}, ttl)
+
+    def purge(self):
+        """Hapus entri yang sudah kedaluwarsa."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?", (time.time(),))
+
+    def close(self):
+        self._conn.close()
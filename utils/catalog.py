@@ -0,0 +1,460 @@
+import os
+import json
+import zlib
+import threading
+import numpy as np
+import pandas as pd
+
+from utils.artifacts import resolve_model_dir
+from utils.genres import parse_genres
+from utils.perf import span, timed
+
+# KONFIGURASI PATH
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+MODEL_DIR = os.path.join(BASE_DIR, "..", "models")
+CATALOG_CSV = os.path.join(MODEL_DIR, "indexed_tracks.csv")
+CATALOG_DIRNAME = "catalog"
+
+# Fitur audio (urutan sama dengan scaler.pkl)
+FEATURES = ["valence", "energy", "danceability", "tempo", "popularity_track"]
+
+# Kolom teks berulang disimpan sebagai category agar hemat memori
+CATEGORICAL = ["mood", "genres", "artist_name"]
+
+CSV_DTYPES = {
+    **{c: "category" for c in CATEGORICAL},
+    **{c: "float32" for c in FEATURES + ["popularity"]},
+    "track_id": "object",
+    "track_name": "object",
+}
+
+# Pemisah antar string di blob biner
+STRING_SEP = b"\x00"
+
+
+class StringTable:
+    """
+    Kolom string variabel dalam satu blob UTF-8 + offset byte (keduanya .npy),
+    sehingga bisa di-memory-map tanpa membuat jutaan objek str sekaligus.
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    @classmethod
+    def from_values(cls, values):
+        encoded = [
+            ("" if pd.isna(v) else str(v)).encode("utf-8").replace(STRING_SEP, b" ")
+            for v in values
+        ]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) + 1 for e in encoded], out=offsets[1:])
+        blob = STRING_SEP.join(encoded) + STRING_SEP if encoded else b""
+        return cls(np.frombuffer(blob, dtype=np.uint8), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.blob[self.offsets[i]:self.offsets[i + 1] - 1].tobytes().decode("utf-8")
+
+    def take(self, positions):
+        return np.array([self[i] for i in positions], dtype=object)
+
+    def to_numpy(self):
+        if len(self) == 0:
+            return np.array([], dtype=object)
+        text = self.blob[:-1].tobytes().decode("utf-8")
+        return np.array(text.split(STRING_SEP.decode()), dtype=object)
+
+
+class CategoryColumn:
+    """Kolom kategori: kode integer (.npy) + daftar kategori (di meta.json)."""
+
+    def __init__(self, codes, categories):
+        self.codes = codes
+        self.categories = pd.Index(categories)
+
+    def __len__(self):
+        return len(self.codes)
+
+    def take(self, positions):
+        return pd.Categorical.from_codes(np.asarray(self.codes[positions]), self.categories)
+
+    def to_numpy(self):
+        return pd.Categorical.from_codes(np.asarray(self.codes), self.categories)
+
+
+class TrackIndex:
+    """
+    Indeks hash track_id -> posisi baris (lookup O(1) rata-rata).
+
+    Disimpan sebagai dua array .npy (offset bucket & posisi per bucket) di
+    samping katalog biner, jadi ikut di-memory-map dan tidak perlu dibangun
+    ulang saat serving. Hash crc32 stabil lintas proses; setiap kandidat
+    tetap diverifikasi dengan membandingkan track_id aslinya.
+    """
+
+    def __init__(self, bucket_offsets, positions):
+        self.bucket_offsets = bucket_offsets
+        self.positions = positions
+        self.mask = len(bucket_offsets) - 2
+
+    @classmethod
+    def build(cls, track_ids):
+        n = len(track_ids)
+        n_buckets = 1 << max(int(n - 1).bit_length(), 0)
+        hashes = np.fromiter((_hash_id(t) for t in track_ids), dtype=np.uint32, count=n)
+        buckets = hashes & np.uint32(n_buckets - 1)
+        offsets = np.zeros(n_buckets + 1, dtype=np.int64)
+        np.cumsum(np.bincount(buckets, minlength=n_buckets), out=offsets[1:])
+        positions = np.argsort(buckets, kind="stable").astype(np.int64)
+        return cls(offsets, positions)
+
+    def lookup(self, track_id, track_ids):
+        """Posisi baris `track_id` atau None; `track_ids` = kolom track_id katalog."""
+        b = _hash_id(track_id) & self.mask
+        for p in self.positions[self.bucket_offsets[b]:self.bucket_offsets[b + 1]]:
+            if track_ids[p] == track_id:
+                return int(p)
+        return None
+
+
+def _hash_id(track_id):
+    return zlib.crc32(str(track_id).encode("utf-8"))
+
+
+class Catalog:
+    """
+    Katalog lagu (indexed_tracks) yang dimuat sekali per proses dan dipakai
+    bersama oleh Recommender, recommend_by_song dan semua halaman app.
+
+    Kolom disimpan per kolom (ndarray, CategoryColumn atau StringTable). Dari
+    format biner semua array di-memory-map read-only, jadi beberapa worker di
+    satu host berbagi page yang sama; DataFrame penuh baru dibuat saat `df`
+    benar-benar diakses.
+    """
+
+    def __init__(self, columns, source=None, df=None):
+        self.columns = columns
+        self.source = source
+        self.model_dir = None
+        self._df = df
+        self._features = None
+        self._track_index = None
+        self._groups = {}
+        self._genre_buckets = None
+        self._artifacts = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_frame(cls, df, source=None):
+        df = normalize(df)
+        columns = {}
+        for c in df.columns:
+            s = df[c]
+            if isinstance(s.dtype, pd.CategoricalDtype):
+                columns[c] = CategoryColumn(s.cat.codes.to_numpy(), s.cat.categories)
+            else:
+                columns[c] = s.to_numpy()
+        return cls(columns, source=source, df=df)
+
+    @classmethod
+    def from_csv(cls, path=CATALOG_CSV):
+        df = pd.read_csv(path, dtype=CSV_DTYPES, low_memory=False)
+        return cls.from_frame(df, source=path)
+
+    @classmethod
+    def from_binary(cls, directory, mmap_mode="r"):
+        with open(os.path.join(directory, "meta.json")) as f:
+            meta = json.load(f)
+
+        def arr(name):
+            return np.load(os.path.join(directory, name), mmap_mode=mmap_mode)
+
+        columns = {}
+        for spec in meta["columns"]:
+            name, kind = spec["name"], spec["kind"]
+            if kind == "string":
+                columns[name] = StringTable(arr(f"{name}.blob.npy"), arr(f"{name}.offsets.npy"))
+            elif kind == "category":
+                columns[name] = CategoryColumn(arr(f"{name}.codes.npy"), spec["categories"])
+            else:
+                columns[name] = arr(f"{name}.npy")
+        catalog = cls(columns, source=directory)
+        if os.path.exists(os.path.join(directory, "track_index.offsets.npy")):
+            catalog._track_index = TrackIndex(
+                arr("track_index.offsets.npy"), arr("track_index.positions.npy")
+            )
+        return catalog
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    @property
+    def df(self):
+        """DataFrame penuh (dibuat sekali saat pertama kali dibutuhkan)."""
+        if self._df is None:
+            self._df = pd.DataFrame({c: _full(col) for c, col in self.columns.items()})
+        return self._df
+
+    @property
+    def features(self):
+        """Matriks fitur mentah float32 (n_tracks, len(FEATURES))."""
+        if self._features is None:
+            self._features = np.column_stack(
+                [np.asarray(self.columns[c], dtype=np.float32) for c in FEATURES]
+            )
+        return self._features
+
+    @property
+    def track_index(self):
+        if self._track_index is None:
+            self._track_index = TrackIndex.build(_full(self.columns["track_id"]))
+        return self._track_index
+
+    def position(self, track_id):
+        """Posisi baris untuk `track_id` (None jika tidak ada)."""
+        if not len(self):
+            return None
+        return self.track_index.lookup(track_id, self.columns["track_id"])
+
+    def group_positions(self, column):
+        """Dict kategori -> array posisi baris (urut naik) untuk kolom kategori."""
+        if column not in self._groups:
+            col = self.columns[column]
+            codes = np.asarray(col.codes)
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(len(col.categories) + 1))
+            self._groups[column] = {
+                str(cat): order[bounds[i]:bounds[i + 1]]
+                for i, cat in enumerate(col.categories)
+                if bounds[i + 1] > bounds[i]
+            }
+        return self._groups[column]
+
+    def artifact(self, name, cls, build):
+        """
+        Struktur turunan katalog bernama `name` (mis. SearchIndex, GenreMatrix),
+        dibuat sekali per katalog: `cls.load` dari folder katalog biner bila
+        `cls.exists` (ditulis saat training/update), selain itu `build(self)`.
+        Disimpan di objek katalog, jadi ikut dilepas bersama versi lama.
+        """
+        value = self._artifacts.get(name)
+        if value is None:
+            with self._lock:
+                value = self._artifacts.get(name)
+                if value is None:
+                    source = self.source
+                    with span(f"{name}.load"):
+                        if source and os.path.isdir(source) and cls.exists(source):
+                            value = cls.load(source)
+                        else:
+                            value = build(self)
+                    self._artifacts[name] = value
+        return value
+
+    def genre_buckets(self):
+        """
+        (kode genre utama per baris, daftar nama genre). Genre utama = genre
+        pertama di kolom `genres`; -1 = lagu tanpa genre. Parsing dilakukan
+        sekali per kategori genres unik, bukan per baris.
+        """
+        if self._genre_buckets is None:
+            col = self.columns.get("genres")
+            if col is None:
+                self._genre_buckets = (np.full(len(self), -1, dtype=np.int32), [])
+            else:
+                primary = [primary_genre(c) for c in col.categories]
+                names = sorted({g for g in primary if g})
+                lookup = {g: i for i, g in enumerate(names)}
+                # slot terakhir untuk kode -1 (genres kosong/NaN)
+                per_category = np.array([lookup.get(g, -1) for g in primary] + [-1], dtype=np.int32)
+                self._genre_buckets = (per_category[np.asarray(col.codes)], names)
+        return self._genre_buckets
+
+    def moods(self):
+        mood = self.columns.get("mood")
+        if mood is None:
+            return []
+        return sorted(str(m) for m in mood.categories)
+
+    def take(self, positions):
+        """Ambil baris berdasarkan posisi (bukan label index)."""
+        positions = np.asarray(positions, dtype=np.int64)
+        if self._df is not None:
+            return self._df.iloc[positions]
+        return pd.DataFrame(
+            {c: _take(col, positions) for c, col in self.columns.items()},
+            index=positions,
+        )
+
+
+def primary_genre(value):
+    """Genre pertama (lowercase) dari nilai kolom genres; None bila kosong."""
+    genres = parse_genres(value)
+    return genres[0] if genres else None
+
+
+def _take(col, positions):
+    if isinstance(col, (StringTable, CategoryColumn)):
+        return col.take(positions)
+    return np.asarray(col[positions])
+
+
+def _full(col):
+    if isinstance(col, (StringTable, CategoryColumn)):
+        return col.to_numpy()
+    return np.asarray(col)
+
+
+def normalize(df):
+    """Samakan nama kolom & dtype dengan yang dipakai recommender dan UI."""
+    # ensure popularity column name
+    if "popularity" in df.columns and "popularity_track" not in df.columns:
+        df = df.rename(columns={"popularity": "popularity_track"})
+
+    updates = {}
+    if "mood" in df.columns and not _is_normalized_mood(df["mood"]):
+        updates["mood"] = df["mood"].astype(str).str.capitalize().astype("category")
+    for c in CATEGORICAL:
+        if c in df.columns and c not in updates and not isinstance(df[c].dtype, pd.CategoricalDtype):
+            updates[c] = df[c].astype("category")
+    for c in FEATURES:
+        if c in df.columns and df[c].dtype != np.float32:
+            updates[c] = df[c].astype(np.float32)
+    if updates:
+        df = df.assign(**updates)
+    return df.reset_index(drop=True)
+
+
+def _is_normalized_mood(mood):
+    if not isinstance(mood.dtype, pd.CategoricalDtype):
+        return False
+    cats = mood.cat.categories.astype(str)
+    return not mood.hasnans and bool((cats == cats.str.capitalize()).all())
+
+
+# FORMAT BINER (kolom .npy + meta.json)
+def save_catalog(df, directory):
+    """
+    Tulis katalog ke format kolumnar biner di `directory`.
+    meta.json ditulis paling akhir sehingga folder setengah jadi tidak terbaca.
+    """
+    _save_columns(Catalog.from_frame(df).columns, directory)
+
+
+def append_catalog(catalog, df, directory):
+    """
+    Tulis katalog baru ke `directory` = `catalog` + baris `df` di belakangnya,
+    per kolom (blob string & kode kategori disambung, tanpa membuat DataFrame
+    penuh). Posisi baris lama tidak berubah. Return Catalog hasil (mmap).
+    """
+    df = normalize(df).reindex(columns=list(catalog.columns))
+    columns = {c: _append(col, df[c]) for c, col in catalog.columns.items()}
+    _save_columns(columns, directory)
+    return Catalog.from_binary(directory)
+
+
+def _append(col, values):
+    if isinstance(col, StringTable):
+        new = StringTable.from_values(values.to_numpy())
+        blob = np.concatenate([np.asarray(col.blob), new.blob])
+        offsets = np.concatenate([np.asarray(col.offsets), col.offsets[-1] + new.offsets[1:]])
+        return StringTable(blob, offsets)
+    if isinstance(col, CategoryColumn):
+        values = values.astype(object)
+        extra = pd.Index(values.dropna().unique()).difference(col.categories, sort=False)
+        categories = col.categories.append(extra)
+        new_codes = pd.Categorical(values, categories=categories).codes
+        dtype = np.promote_types(np.asarray(col.codes).dtype, new_codes.dtype)
+        return CategoryColumn(np.concatenate([np.asarray(col.codes, dtype=dtype), new_codes.astype(dtype)]), categories)
+    col = np.asarray(col)
+    return np.concatenate([col, values.to_numpy().astype(col.dtype)])
+
+
+def _save_columns(columns, directory):
+    os.makedirs(directory, exist_ok=True)
+
+    def save(name, array):
+        np.save(os.path.join(directory, name), np.ascontiguousarray(array))
+
+    specs = []
+    for c, col in columns.items():
+        if isinstance(col, CategoryColumn):
+            save(f"{c}.codes.npy", col.codes)
+            specs.append({"name": c, "kind": "category", "categories": [str(x) for x in col.categories]})
+        elif isinstance(col, StringTable) or not pd.api.types.is_numeric_dtype(np.asarray(col).dtype):
+            table = col if isinstance(col, StringTable) else StringTable.from_values(col)
+            save(f"{c}.blob.npy", table.blob)
+            save(f"{c}.offsets.npy", table.offsets)
+            specs.append({"name": c, "kind": "string"})
+        else:
+            save(f"{c}.npy", col)
+            specs.append({"name": c, "kind": "numeric"})
+
+    # Indeks track_id dibangun sekali bersama katalog
+    track_index = TrackIndex.build(_full(columns["track_id"]))
+    save("track_index.offsets.npy", track_index.bucket_offsets)
+    save("track_index.positions.npy", track_index.positions)
+
+    n_rows = len(next(iter(columns.values()))) if columns else 0
+    meta_path = os.path.join(directory, "meta.json")
+    with open(meta_path + ".tmp", "w") as f:
+        json.dump({"n_rows": n_rows, "columns": specs}, f)
+    os.replace(meta_path + ".tmp", meta_path)
+
+
+@timed("catalog.load")
+def load_catalog(path=MODEL_DIR):
+    """
+    `path` boleh berupa folder model (pakai format biner `catalog/` bila ada,
+    fallback ke indexed_tracks.csv) atau langsung file CSV. Folder model asal
+    dicatat di `catalog.model_dir` (scaler & indeks dibaca dari sana).
+    """
+    if os.path.isdir(path):
+        model_dir = path
+        binary_dir = os.path.join(path, CATALOG_DIRNAME)
+        if os.path.exists(os.path.join(binary_dir, "meta.json")):
+            catalog = Catalog.from_binary(binary_dir)
+        else:
+            catalog = Catalog.from_csv(os.path.join(path, "indexed_tracks.csv"))
+    else:
+        model_dir = os.path.dirname(os.path.abspath(path))
+        catalog = Catalog.from_csv(path)
+    catalog.model_dir = model_dir
+    return catalog
+
+
+# CACHE PROSES (dipakai lintas sesi & rerun Streamlit)
+_catalogs = {}
+_lock = threading.Lock()
+
+
+def get_catalog(path=None):
+    """
+    Kembalikan Catalog untuk `path`, hanya dimuat sekali per proses.
+    Tanpa `path` dipakai versi model aktif (models/CURRENT, lihat utils.artifacts).
+    """
+    if path is None:
+        path = resolve_model_dir()
+    key = os.path.abspath(path)
+    catalog = _catalogs.get(key)
+    if catalog is None:
+        with _lock:
+            catalog = _catalogs.get(key)
+            if catalog is None:
+                catalog = load_catalog(path)
+                _catalogs[key] = catalog
+    return catalog
+
+
+# KONVERSI CSV LAMA -> FORMAT BINER
+if __name__ == "__main__":
+    import sys
+
+    src = sys.argv[1] if len(sys.argv) > 1 else CATALOG_CSV
+    dst = sys.argv[2] if len(sys.argv) > 2 else os.path.join(MODEL_DIR, CATALOG_DIRNAME)
+    save_catalog(pd.read_csv(src, dtype=CSV_DTYPES, low_memory=False), dst)
+    print("Katalog biner disimpan:", dst)
@@ -0,0 +1,163 @@
+import os
+import re
+import json
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+# String bertanda kutip di dalam list genre berformat str(list) Python
+QUOTED_RE = re.compile(r"""'((?:[^'\\]|\\.)*)'|"((?:[^"\\]|\\.)*)\"""")
+
+
+def parse_genres(value):
+    """
+    List genre (lowercase, tanpa duplikat, urutan asli) dari nilai kolom
+    genres: "['pop', 'dance pop']" atau teks biasa dipisah koma.
+    """
+    if not isinstance(value, str):
+        return []
+    value = value.strip()
+    if value.startswith("["):
+        items = [a or b for a, b in QUOTED_RE.findall(value)]
+    else:
+        items = value.split(",")
+    return list(dict.fromkeys(g.strip().lower() for g in items if g.strip()))
+
+
+class GenreMatrix:
+    """
+    Genre per lagu sebagai matriks multi-hot CSR (n_tracks x n_genre): baris =
+    posisi katalog, kolom = indeks di `vocab`. Hanya indptr & indices yang
+    disimpan (nilai selalu 1). String genres diparse sekali per nilai unik
+    saat build, sehingga query tidak pernah mem-parse string.
+    """
+
+    FILES = ("indptr", "indices")
+    VOCAB_FILE = "genres.vocab.json"
+
+    def __init__(self, vocab, indptr, indices):
+        self.vocab = list(vocab)
+        self.indptr = indptr
+        self.indices = indices
+        self._matrix = None
+        self._counts = None
+
+    @classmethod
+    def build(cls, values, vocab=()):
+        """
+        Dari nilai kolom genres per baris (array/Series/CategoryColumn).
+        Genre baru ditambahkan di belakang `vocab` (indeks lama tetap).
+        """
+        codes, uniques = _factorize(values)
+        vocab = list(vocab)
+        lookup = {g: i for i, g in enumerate(vocab)}
+        parsed = [parse_genres(u) for u in uniques]
+        for g in sorted({g for genres in parsed for g in genres} - lookup.keys()):
+            lookup[g] = len(vocab)
+            vocab.append(g)
+
+        # CSR per nilai unik (+ satu baris kosong untuk NaN / kode -1)
+        lengths = np.array([len(genres) for genres in parsed] + [0], dtype=np.int64)
+        unique_ptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=unique_ptr[1:])
+        unique_idx = np.array([lookup[g] for genres in parsed for g in genres], dtype=np.int32)
+
+        # sebar ke baris: gather ragged tanpa loop Python per lagu
+        codes = np.where(codes < 0, len(parsed), codes)
+        row_len = lengths[codes]
+        indptr = np.zeros(len(codes) + 1, dtype=np.int64)
+        np.cumsum(row_len, out=indptr[1:])
+        src = np.repeat(unique_ptr[codes] - indptr[:-1], row_len) + np.arange(indptr[-1])
+        return cls(vocab, indptr, unique_idx[src])
+
+    def extend(self, values):
+        """Matriks baru dengan baris `values` di belakang (update katalog inkremental)."""
+        new = GenreMatrix.build(values, self.vocab)
+        indptr = np.concatenate([np.asarray(self.indptr), self.indptr[-1] + new.indptr[1:]])
+        return GenreMatrix(new.vocab, indptr, np.concatenate([np.asarray(self.indices), new.indices]))
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    @property
+    def matrix(self):
+        """scipy.sparse.csr_matrix float32 (dibuat sekali, berbagi indptr/indices)."""
+        if self._matrix is None:
+            data = np.ones(len(self.indices), dtype=np.float32)
+            self._matrix = sp.csr_matrix(
+                (data, np.asarray(self.indices), np.asarray(self.indptr)),
+                shape=(len(self), max(len(self.vocab), 1)),
+            )
+        return self._matrix
+
+    @property
+    def counts(self):
+        """Jumlah genre per lagu."""
+        if self._counts is None:
+            self._counts = np.diff(np.asarray(self.indptr))
+        return self._counts
+
+    def genres(self, position):
+        return [self.vocab[i] for i in self.indices[self.indptr[position]:self.indptr[position + 1]]]
+
+    def jaccard(self, seeds, candidates):
+        """
+        Kemiripan Jaccard genre antara tiap seed dan kandidatnya.
+        `candidates` (m, c) berisi posisi katalog (-1 = kosong -> 0).
+        Irisan dihitung dengan perkalian elementwise sparse pada baris
+        kandidat saja, bukan seluruh katalog.
+        """
+        candidates = np.asarray(candidates, dtype=np.int64)
+        m, c = candidates.shape
+        rows = candidates.ravel()
+        valid = rows >= 0
+        rows = np.where(valid, rows, 0)
+        seed_rows = np.repeat(np.asarray(seeds, dtype=np.int64), c)
+
+        G = self.matrix
+        inter = np.asarray(G[rows].multiply(G[seed_rows]).sum(axis=1)).ravel()
+        union = self.counts[rows] + self.counts[seed_rows] - inter
+        score = np.divide(inter, union, out=np.zeros(len(rows), dtype=np.float64), where=union > 0)
+        score[~valid] = 0.0
+        return score.reshape(m, c).astype(np.float32)
+
+    # FILE: genres.{indptr,indices}.npy + genres.vocab.json di folder katalog biner
+    def save(self, directory):
+        for name in self.FILES:
+            np.save(os.path.join(directory, f"genres.{name}.npy"), np.asarray(getattr(self, name)))
+        with open(os.path.join(directory, self.VOCAB_FILE), "w") as f:
+            json.dump(self.vocab, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, cls.VOCAB_FILE)) as f:
+            vocab = json.load(f)
+        arrays = {
+            name: np.load(os.path.join(directory, f"genres.{name}.npy"), mmap_mode="r")
+            for name in cls.FILES
+        }
+        return cls(vocab, **arrays)
+
+    @classmethod
+    def exists(cls, directory):
+        return os.path.exists(os.path.join(directory, cls.VOCAB_FILE))
+
+
+def _factorize(values):
+    """(kode per baris, nilai unik); CategoryColumn katalog dipakai langsung."""
+    if hasattr(values, "codes") and hasattr(values, "categories"):
+        return np.asarray(values.codes, dtype=np.int64), [str(c) for c in values.categories]
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    return codes.astype(np.int64), list(uniques)
+
+
+def build_genre_matrix(catalog):
+    col = catalog.columns.get("genres")
+    if col is None:
+        return GenreMatrix([], np.zeros(len(catalog) + 1, dtype=np.int64), np.zeros(0, dtype=np.int32))
+    return GenreMatrix.build(col)
+
+
+def get_genre_matrix(catalog):
+    """GenreMatrix untuk `catalog` (lihat Catalog.artifact)."""
+    return catalog.artifact("genres", GenreMatrix, build_genre_matrix)
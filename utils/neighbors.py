@@ -0,0 +1,500 @@
+import time
+import threading
+import numpy as np
+import joblib
+
+# Batas elemen matriks jarak per chunk (float32 -> 64 MB) agar memori terbatas
+CHUNK_ELEMENTS = 1 << 24
+
+
+# UTILITIES
+def sq_norms(X):
+    X = np.asarray(X)
+    return np.einsum("ij,ij->i", X, X)
+
+
+class RowView:
+    """
+    Baris X[positions] tanpa salinan permanen: indeks lokal 0..len-1
+    dipetakan ke posisi katalog saat diakses. Dipakai indeks per partisi;
+    np.asarray(view) mengumpulkan baris ke array sementara.
+    """
+
+    def __init__(self, X, positions):
+        self.X = X
+        self.positions = positions
+        self.shape = (len(positions),) + tuple(X.shape[1:])
+        self.dtype = X.dtype
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __getitem__(self, key):
+        return np.asarray(self.X[self.positions[key]])
+
+    def __array__(self, dtype=None, copy=None):
+        rows = np.asarray(self.X[self.positions])
+        return rows if dtype is None else rows.astype(dtype, copy=False)
+
+
+def drop_excluded(distances, indices, exclude, k):
+    """
+    Buang satu posisi `exclude` per baris hasil (k+1 kolom) -> k kolom.
+    Jika posisi itu tidak ada di hasil, kolom terakhir (terjauh) yang dibuang.
+    """
+    drop = indices == np.asarray(exclude)[:, None]
+    drop[~drop.any(axis=1), -1] = True
+    drop &= np.cumsum(drop, axis=1) == 1
+    m = len(indices)
+    return distances[~drop].reshape(m, k), indices[~drop].reshape(m, k)
+
+
+def knn_search(X, queries, k, exclude=None, sq_norms_=None, chunk_elements=CHUNK_ELEMENTS):
+    """
+    Exact k-NN euclidean untuk banyak query sekaligus (NumPy murni).
+
+    Jarak dihitung sebagai |q|^2 - 2 q.x + |x|^2 per chunk query sehingga
+    matriks jarak tidak melebihi `chunk_elements`, lalu top-k diambil dengan
+    argpartition. `exclude` (satu posisi per query, mis. lagu seed) dibuang
+    dari hasil. Return (distances, indices) berukuran (n_queries, k).
+    """
+    queries = np.asarray(queries, dtype=np.float32)
+    X = np.asarray(X)
+    n = len(X)
+    extra = 1 if exclude is not None else 0
+    k = min(k, n - extra)
+    kk = k + extra
+    if sq_norms_ is None:
+        sq_norms_ = sq_norms(X)
+
+    m = len(queries)
+    distances = np.empty((m, max(k, 0)), dtype=np.float32)
+    indices = np.empty((m, max(k, 0)), dtype=np.int64)
+    if k <= 0:
+        return distances, indices
+
+    step = max(1, chunk_elements // max(n, 1))
+    for start in range(0, m, step):
+        q = queries[start:start + step]
+        d = q @ X.T
+        d *= -2
+        d += sq_norms_
+        d += sq_norms(q)[:, None]
+
+        if kk < n:
+            idx = np.argpartition(d, kk - 1, axis=1)[:, :kk]
+        else:
+            idx = np.broadcast_to(np.arange(n), (len(q), n))
+        dist = np.take_along_axis(d, idx, axis=1)
+        order = np.argsort(dist, axis=1, kind="stable")
+        idx = np.take_along_axis(idx, order, axis=1)
+        dist = np.take_along_axis(dist, order, axis=1)
+
+        if extra:
+            dist, idx = drop_excluded(dist, idx, exclude[start:start + step], k)
+
+        distances[start:start + len(q)] = np.sqrt(np.maximum(dist, 0))
+        indices[start:start + len(q)] = idx
+    return distances, indices
+
+
+# BACKEND INDEKS
+class BruteForceIndex:
+    """Exact brute force (knn_search). Tidak menyimpan data di pickle."""
+
+    name = "brute"
+
+    def __init__(self, chunk_elements=CHUNK_ELEMENTS):
+        self.chunk_elements = chunk_elements
+        self._X = None
+        self._sq = None
+
+    def fit(self, X):
+        return self.attach(X)
+
+    def attach(self, X):
+        """Pasang matriks fitur ter-scale (boleh memory-mapped)."""
+        self._X = X
+        self._sq = sq_norms(X)
+        return self
+
+    def extend(self, X):
+        """Tambah baris baru (X = matriks lengkap, baris lama di depan)."""
+        return self.attach(X)
+
+    def search(self, queries, k, exclude=None):
+        return knn_search(self._X, queries, k, exclude=exclude,
+                          sq_norms_=self._sq, chunk_elements=self.chunk_elements)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_X"] = state["_sq"] = None
+        return state
+
+
+class TreeIndex:
+    """Exact KD-tree / Ball-tree dari sklearn (pohon ikut disimpan di pickle)."""
+
+    def __init__(self, kind="kd", leaf_size=40):
+        self.kind = kind
+        self.name = kind
+        self.leaf_size = leaf_size
+        self.tree = None
+
+    def fit(self, X):
+        from sklearn.neighbors import BallTree, KDTree
+
+        tree_cls = KDTree if self.kind == "kd" else BallTree
+        self.tree = tree_cls(np.asarray(X, dtype=np.float64), leaf_size=self.leaf_size)
+        return self
+
+    def attach(self, X):
+        return self
+
+    def extend(self, X):
+        # pohon sklearn tidak mendukung insert -> dibangun ulang (tanpa training lain)
+        return self.fit(X)
+
+    def search(self, queries, k, exclude=None):
+        n = self.tree.data.shape[0]
+        extra = 1 if exclude is not None else 0
+        k = min(k, n - extra)
+        dist, idx = self.tree.query(np.asarray(queries, dtype=np.float64), k=k + extra)
+        if extra:
+            dist, idx = drop_excluded(dist, idx, exclude, k)
+        return dist.astype(np.float32), idx.astype(np.int64)
+
+
+class IVFIndex:
+    """
+    Approximate inverted-file index (IVF): k-means coarse quantizer membagi
+    katalog menjadi `n_lists` sel; query hanya memeriksa `n_probe` sel terdekat
+    lalu jaraknya dihitung exact. `n_probe` bisa diubah saat serving untuk
+    menukar recall dengan latency. Data tidak ikut disimpan di pickle.
+    """
+
+    name = "ivf"
+
+    def __init__(self, n_lists=None, n_probe=8, n_iter=20, sample_size=100_000, seed=0):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.n_iter = n_iter
+        self.sample_size = sample_size
+        self.seed = seed
+        self.centroids = None
+        self.list_offsets = None
+        self.list_positions = None
+        self._X = None
+
+    def fit(self, X):
+        n = len(X)
+        if self.n_lists is None:
+            self.n_lists = int(np.clip(4 * np.sqrt(n), 1, 65536))
+        self.n_lists = min(self.n_lists, n)
+
+        rng = np.random.default_rng(self.seed)
+        sample = np.asarray(X[rng.choice(n, min(n, self.sample_size), replace=False)], dtype=np.float32)
+        self.centroids = kmeans(sample, self.n_lists, self.n_iter, rng)
+
+        assign = self._assign(X)
+        self.list_offsets = np.zeros(self.n_lists + 1, dtype=np.int64)
+        np.cumsum(np.bincount(assign, minlength=self.n_lists), out=self.list_offsets[1:])
+        self.list_positions = np.argsort(assign, kind="stable").astype(np.int64)
+        return self.attach(X)
+
+    def attach(self, X):
+        self._X = X
+        return self
+
+    def extend(self, X):
+        """
+        Tambah baris len(list_positions).. dari X ke sel terdekat. Centroid
+        tidak dilatih ulang; jalankan train_knn sesekali bila distribusi bergeser.
+        """
+        n_old = len(self.list_positions)
+        cells = np.concatenate([
+            np.repeat(np.arange(self.n_lists), np.diff(self.list_offsets)),
+            self._assign(np.asarray(X[n_old:])),
+        ])
+        positions = np.concatenate([self.list_positions, np.arange(n_old, len(X))])
+        order = np.argsort(cells, kind="stable")
+        np.cumsum(np.bincount(cells, minlength=self.n_lists), out=self.list_offsets[1:])
+        self.list_positions = positions[order]
+        return self.attach(X)
+
+    def subset(self, rows):
+        """
+        IVF untuk sebagian baris (`rows` = RowView) dengan quantizer yang sama:
+        list hanya berisi anggota `rows` (indeks lokal) dan sel tanpa anggota
+        dibuang. `n_probe` dinaikkan agar jumlah kandidat per query kira-kira
+        sama dengan query tanpa filter (sel partisi lebih jarang isinya).
+        Tanpa k-means ulang; biayanya O(n) sekali per partisi.
+        """
+        member = np.zeros(len(self.list_positions), dtype=bool)
+        member[rows.positions] = True
+        keep = member[self.list_positions]
+        cells = np.repeat(np.arange(self.n_lists), np.diff(self.list_offsets))[keep]
+        counts = np.bincount(cells, minlength=self.n_lists)
+        filled = counts > 0
+
+        n_lists = int(filled.sum())
+        candidates = self.n_probe * len(self.list_positions) / max(self.n_lists, 1)
+        n_probe = int(np.clip(np.ceil(candidates * n_lists / max(len(rows), 1)), self.n_probe, max(n_lists, 1)))
+
+        sub = IVFIndex(n_lists, n_probe, self.n_iter, self.sample_size, self.seed)
+        sub.centroids = self.centroids[filled]
+        sub.list_offsets = np.zeros(sub.n_lists + 1, dtype=np.int64)
+        np.cumsum(counts[filled], out=sub.list_offsets[1:])
+        # list_positions sudah terkelompok per sel -> urutan tetap
+        sub.list_positions = np.searchsorted(rows.positions, self.list_positions[keep]).astype(np.int64)
+        return sub.attach(rows)
+
+    def _assign(self, X):
+        _, nearest = knn_search(self.centroids, X, 1)
+        return nearest[:, 0]
+
+    def search(self, queries, k, exclude=None):
+        queries = np.asarray(queries, dtype=np.float32)
+        extra = 1 if exclude is not None else 0
+        k = min(k, len(self._X) - extra)
+        kk = k + extra
+        n_probe = min(self.n_probe, self.n_lists)
+        _, probes = knn_search(self.centroids, queries, n_probe)
+
+        distances = np.full((len(queries), kk), np.inf, dtype=np.float32)
+        indices = np.full((len(queries), kk), -1, dtype=np.int64)
+        for i, q in enumerate(queries):
+            cand = np.concatenate([
+                self.list_positions[self.list_offsets[l]:self.list_offsets[l + 1]] for l in probes[i]
+            ])
+            d = np.sum((np.asarray(self._X[cand]) - q) ** 2, axis=1)
+            top = np.argpartition(d, kk - 1)[:kk] if len(d) > kk else np.arange(len(d))
+            top = top[np.argsort(d[top], kind="stable")]
+            distances[i, :len(top)] = np.sqrt(d[top])
+            indices[i, :len(top)] = cand[top]
+        if extra:
+            distances, indices = drop_excluded(distances, indices, exclude, k)
+        return distances, indices
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_X"] = None
+        return state
+
+
+class PartitionIndex:
+    """
+    Pencarian yang dibatasi satu partisi (mis. satu mood): baris dengan label
+    sama dikumpulkan sekali, dan tiap partisi punya indeks sendiri dengan
+    backend yang sama dengan indeks utama, dibuat saat pertama dipakai. IVF
+    memakai quantizer indeks utama (`parent.subset`), kd/ball membangun pohon
+    kecil per partisi, brute force menghitung jarak ke anggota partisi saja.
+    Baris dirujuk lewat posisi (RowView), tidak disalin per partisi.
+    Label < 0 = baris tidak masuk partisi mana pun.
+    """
+
+    def __init__(self, X, labels, backend="brute", parent=None, **params):
+        self._X = X
+        self.backend = backend
+        self.parent = parent
+        self.params = params
+        labels = np.asarray(labels, dtype=np.int64)
+        n_labels = int(labels.max()) + 1 if len(labels) else 0
+        order = np.argsort(labels, kind="stable")
+        self.bounds = np.searchsorted(labels[order], np.arange(n_labels + 1))
+        self.order = order
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def positions(self, label):
+        """Posisi katalog anggota partisi `label` (urut naik)."""
+        if label < 0 or label + 1 >= len(self.bounds):
+            return self.order[:0]
+        return self.order[self.bounds[label]:self.bounds[label + 1]]
+
+    def _index(self, label):
+        index = self._indexes.get(label)
+        if index is None:
+            with self._lock:
+                index = self._indexes.get(label)
+                if index is None:
+                    rows = RowView(self._X, self.positions(label))
+                    if self.parent is not None and hasattr(self.parent, "subset"):
+                        index = self.parent.subset(rows)
+                    else:
+                        index = build_index(rows, self.backend, **self.params)
+                    self._indexes[label] = index
+        return index
+
+    def search(self, label, queries, k, exclude=None):
+        """
+        Sama dengan index.search tetapi hanya di partisi `label`. `exclude`
+        (posisi katalog per query, mis. seed) dibuang bila anggota partisi.
+        Return (distances, indices) dengan indices = posisi katalog.
+        """
+        positions = self.positions(label)
+        m = len(queries)
+        if not len(positions):
+            return np.empty((m, 0), dtype=np.float32), np.empty((m, 0), dtype=np.int64)
+
+        local = None
+        if exclude is not None:
+            exclude = np.asarray(exclude, dtype=np.int64)
+            local = np.minimum(np.searchsorted(positions, exclude), len(positions) - 1)
+            # seed di luar partisi: -1 -> drop_excluded membuang kolom terjauh
+            local = np.where(positions[local] == exclude, local, -1)
+            if (local < 0).all():
+                local = None
+        distances, indices = self._index(label).search(queries, k, exclude=local)
+        # slot kosong (-1, mis. sel IVF yang diperiksa kurang dari k kandidat) tetap -1
+        return distances, np.where(indices >= 0, positions[indices], -1)
+
+
+def kmeans(X, n_clusters, n_iter=20, rng=None):
+    """K-means (Lloyd) sederhana dengan NumPy; inisialisasi sampel acak."""
+    rng = rng or np.random.default_rng(0)
+    centroids = X[rng.choice(len(X), n_clusters, replace=False)].copy()
+    for _ in range(n_iter):
+        _, nearest = knn_search(centroids, X, 1)
+        nearest = nearest[:, 0]
+        counts = np.bincount(nearest, minlength=n_clusters)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, nearest, X)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+        # sel kosong diisi ulang dengan titik acak
+        empty = np.flatnonzero(~filled)
+        if len(empty):
+            centroids[empty] = X[rng.choice(len(X), len(empty), replace=False)]
+    return centroids
+
+
+BACKENDS = {
+    "brute": BruteForceIndex,
+    "kd": lambda **kw: TreeIndex(kind="kd", **kw),
+    "ball": lambda **kw: TreeIndex(kind="ball", **kw),
+    "ivf": IVFIndex,
+}
+
+
+def build_index(X, backend="brute", **params):
+    """Bangun indeks `backend` (lihat BACKENDS) di atas matriks ter-scale X."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend indeks tidak dikenal: {backend!r} (pilihan: {', '.join(BACKENDS)})")
+    return BACKENDS[backend](**params).fit(X)
+
+
+def save_index(index, path):
+    joblib.dump(index, path)
+
+
+def load_index(path, X):
+    """Muat indeks dari pickle lalu pasang matriks fitur X."""
+    return joblib.load(path).attach(X)
+
+
+# TABEL TETANGGA (top-K per lagu, dihitung saat training)
+def _neighbors_chunk(index, X, positions, k):
+    index.attach(X)
+    return index.search(np.asarray(X[positions]), k, exclude=positions)
+
+
+def precompute_neighbors(index, X, k=10, n_jobs=-1, chunk_size=4096):
+    """
+    Hitung top-k tetangga (tanpa lagu itu sendiri) untuk setiap baris X,
+    paralel per chunk di semua core. Return (indices int32, distances float16)
+    berukuran (n_tracks, k).
+    """
+    from joblib import Parallel, delayed
+
+    n = len(X)
+    k = min(k, n - 1)
+    chunks = [np.arange(s, min(s + chunk_size, n)) for s in range(0, n, chunk_size)]
+    results = Parallel(n_jobs=n_jobs)(
+        delayed(_neighbors_chunk)(index, X, positions, k) for positions in chunks
+    )
+    indices = np.empty((n, k), dtype=np.int32)
+    distances = np.empty((n, k), dtype=np.float16)
+    for positions, (dist, idx) in zip(chunks, results):
+        indices[positions] = idx
+        distances[positions] = dist
+    return indices, distances
+
+
+def update_neighbors(index, X, n_old, indices, distances, chunk_size=65536):
+    """
+    Perbarui tabel top-K setelah baris n_old.. ditambahkan ke X (`index`
+    sudah mencakup baris baru). Hanya baris baru yang dicari penuh lewat
+    `index`; untuk baris lama hanya dicari lagu baru terdekat (KD-tree kecil
+    di atas baris baru, per chunk) dan hanya baris yang tetangga ke-K-nya
+    lebih jauh dari lagu baru itu yang ditulis ulang.
+    Return (indices, distances, n_changed).
+    """
+    from scipy.spatial import cKDTree
+
+    n, k = len(X), indices.shape[1]
+    X_new = np.asarray(X[n_old:], dtype=np.float32)
+    k_new = min(k, len(X_new))
+
+    out_idx = np.empty((n, k), dtype=indices.dtype)
+    out_dist = np.empty((n, k), dtype=distances.dtype)
+    out_idx[:n_old] = indices
+    out_dist[:n_old] = distances
+
+    # baris baru: top-K penuh lewat indeks yang sudah ada (tanpa struktur
+    # sementara di atas seluruh X)
+    positions = np.arange(n_old, n)
+    dist, idx = index.search(X_new, k, exclude=positions)
+    out_idx[positions] = idx
+    out_dist[positions] = dist
+
+    # baris lama: gabungkan dengan lagu baru yang lebih dekat dari tetangga ke-K
+    changed = 0
+    tree = cKDTree(X_new)
+    for s in range(0, n_old, chunk_size):
+        e = min(s + chunk_size, n_old)
+        chunk = np.asarray(X[s:e])
+        nearest, _ = tree.query(chunk, k=1)
+        rows = np.flatnonzero(nearest < out_dist[s:e, -1].astype(np.float32))
+        if not len(rows):
+            continue
+        dist, idx = tree.query(chunk[rows], k=k_new)
+        dist, idx = dist.reshape(len(rows), k_new), idx.reshape(len(rows), k_new)
+        rows += s
+        cand_dist = np.concatenate([out_dist[rows].astype(np.float32), dist.astype(np.float32)], axis=1)
+        cand_idx = np.concatenate([out_idx[rows].astype(np.int64), idx + n_old], axis=1)
+        top = np.argsort(cand_dist, axis=1, kind="stable")[:, :k]
+        out_dist[rows] = np.take_along_axis(cand_dist, top, axis=1)
+        out_idx[rows] = np.take_along_axis(cand_idx, top, axis=1)
+        changed += len(rows)
+    return out_idx, out_dist, changed
+
+
+# EVALUASI
+def recall_report(index, X, k=10, n_queries=1000, seed=0):
+    """
+    Recall@k indeks terhadap hasil exact brute force pada sampel query dari
+    katalog sendiri, beserta latency rata-rata per query (ms).
+    """
+    rng = np.random.default_rng(seed)
+    positions = rng.choice(len(X), min(n_queries, len(X)), replace=False)
+    queries = np.asarray(X[positions])
+
+    exact = BruteForceIndex().attach(X)
+    t = time.perf_counter()
+    _, truth = exact.search(queries, k, exclude=positions)
+    exact_ms = (time.perf_counter() - t) * 1000 / len(queries)
+
+    t = time.perf_counter()
+    _, found = index.search(queries, k, exclude=positions)
+    index_ms = (time.perf_counter() - t) * 1000 / len(queries)
+
+    hits = sum(len(np.intersect1d(a, b)) for a, b in zip(truth, found))
+    return {
+        "backend": index.name,
+        "k": k,
+        "n_queries": len(queries),
+        "recall": hits / truth.size if truth.size else 1.0,
+        "index_ms_per_query": index_ms,
+        "exact_ms_per_query": exact_ms,
+    }
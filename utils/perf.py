@@ -0,0 +1,201 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from functools import wraps
+
+# Instrumentasi aktif secara default; MOODTUNE_PERF=0 mematikannya (span jadi no-op)
+ENABLED = os.getenv("MOODTUNE_PERF", "1") not in ("0", "false", "no")
+# Jumlah sampel terakhir per operasi untuk persentil
+WINDOW = 2048
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "start")
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.recorder.record(self.name, time.perf_counter() - self.start, exc_type is not None)
+        return False
+
+
+class _OpStats:
+    __slots__ = ("count", "errors", "total", "max", "samples")
+
+    def __init__(self, window):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=window)
+
+
+def _quantile(sorted_values, q):
+    return sorted_values[min(int(q * len(sorted_values)), len(sorted_values) - 1)]
+
+
+class Recorder:
+    """
+    Agregasi latency per operasi (jumlah, error, total, maks, dan persentil
+    dari `window` sampel terakhir). Bila `enabled` False, `span` mengembalikan
+    context manager no-op dan fungsi `timed` langsung dipanggil tanpa timer.
+    """
+
+    def __init__(self, window=WINDOW, enabled=ENABLED):
+        self.window = window
+        self.enabled = enabled
+        self._ops = {}
+        self._collectors = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, seconds, error=False):
+        with self._lock:
+            op = self._ops.get(name)
+            if op is None:
+                op = self._ops[name] = _OpStats(self.window)
+            op.count += 1
+            op.errors += error
+            op.total += seconds
+            if seconds > op.max:
+                op.max = seconds
+            op.samples.append(seconds)
+
+    def span(self, name):
+        """`with span("search.query"): ...` mencatat durasi blok (dan error bila ada exception)."""
+        if not self.enabled:
+            return _NOOP
+        return _Span(self, name)
+
+    def timed(self, name=None):
+        """Dekorator: setiap panggilan fungsi dicatat sebagai operasi `name`."""
+        def decorate(fn):
+            op = name or f"{fn.__module__}.{fn.__qualname__}"
+
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with _Span(self, op):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorate
+
+    def register_collector(self, name, fn):
+        """
+        `fn()` -> dict angka (mis. statistik cache) yang ikut diekspor sebagai
+        gauge. Nilai boleh berupa dict angka satu tingkat (mis. histogram per
+        bucket), diekspor sebagai satu gauge berlabel `key`.
+        """
+        self._collectors[name] = fn
+
+    def reset(self):
+        with self._lock:
+            self._ops.clear()
+
+    def snapshot(self):
+        """Dict operasi -> ringkasan (count, errors, total_s, mean/p50/p90/p99/max dalam ms)."""
+        with self._lock:
+            ops = {name: (op.count, op.errors, op.total, op.max, sorted(op.samples))
+                   for name, op in self._ops.items()}
+        out = {}
+        for name, (count, errors, total, peak, samples) in sorted(ops.items()):
+            row = {"count": count, "errors": errors, "total_s": total,
+                   "mean_ms": total / count * 1000 if count else 0.0}
+            for q in QUANTILES:
+                row[f"p{round(q * 100)}_ms"] = _quantile(samples, q) * 1000 if samples else 0.0
+            row["max_ms"] = peak * 1000
+            out[name] = row
+        return out
+
+    def collect(self):
+        """Hasil semua collector (collector yang gagal dilewati)."""
+        out = {}
+        for name, fn in list(self._collectors.items()):
+            try:
+                out[name] = {k: v for k, v in fn().items()
+                             if _number(v) or (isinstance(v, dict) and all(map(_number, v.values())))}
+            except Exception as e:
+                print(f"Error: collector {name}: {e!r}")
+        return out
+
+    def to_json(self, indent=None):
+        return json.dumps({
+            "enabled": self.enabled,
+            "window": self.window,
+            "operations": self.snapshot(),
+            "collectors": self.collect(),
+        }, indent=indent)
+
+    def to_prometheus(self, prefix="moodtune"):
+        """Format teks Prometheus: summary latency per operasi + gauge collector."""
+        lines = [
+            f"# HELP {prefix}_op_seconds Latency operasi (persentil dari sampel terakhir).",
+            f"# TYPE {prefix}_op_seconds summary",
+        ]
+        snapshot = self.snapshot()
+        for name, row in snapshot.items():
+            label = f'op="{_escape(name)}"'
+            for q in QUANTILES:
+                lines.append(f'{prefix}_op_seconds{{{label},quantile="{q}"}} '
+                             f'{row[f"p{round(q * 100)}_ms"] / 1000:.9g}')
+            lines.append(f"{prefix}_op_seconds_sum{{{label}}} {row['total_s']:.9g}")
+            lines.append(f"{prefix}_op_seconds_count{{{label}}} {row['count']}")
+        lines += [f"# HELP {prefix}_op_errors_total Operasi yang berakhir dengan exception.",
+                  f"# TYPE {prefix}_op_errors_total counter"]
+        for name, row in snapshot.items():
+            lines.append(f'{prefix}_op_errors_total{{op="{_escape(name)}"}} {row["errors"]}')
+        for group, values in self.collect().items():
+            for key, value in values.items():
+                metric = f"{prefix}_{_metric_name(group)}_{_metric_name(key)}"
+                lines.append(f"# TYPE {metric} gauge")
+                if isinstance(value, dict):
+                    lines += [f'{metric}{{key="{_escape(k)}"}} {v:.9g}' for k, v in value.items()]
+                else:
+                    lines.append(f"{metric} {value:.9g}")
+        return "\n".join(lines) + "\n"
+
+
+def _number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _metric_name(value):
+    return "".join(c if c.isalnum() else "_" for c in str(value)).strip("_").lower()
+
+
+# RECORDER BERSAMA (satu per proses)
+recorder = Recorder()
+span = recorder.span
+timed = recorder.timed
+record = recorder.record
+register_collector = recorder.register_collector
+
+
+def enable(flag=True):
+    recorder.enabled = flag
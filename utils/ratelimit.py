@@ -0,0 +1,162 @@
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+
+import requests
+
+# Status yang layak diulang: throttle & error sementara di sisi server
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# Batas atas bucket histogram latency (detik); bucket terakhir = +Inf
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class TokenBucket:
+    """
+    Token bucket bersama untuk semua thread: rata-rata `rate` request/detik
+    dengan lonjakan maksimal `burst`. `acquire` menunggu sampai token tersedia.
+    """
+
+    def __init__(self, rate, burst=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(rate, 1))
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.burst
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            self.sleep(wait)
+
+
+class RequestStats:
+    """Counter request/throttle/retry/error + histogram latency per percobaan."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = {"requests": 0, "throttles": 0, "retries": 0, "errors": 0}
+            self.latency_counts = [0] * (len(self.buckets) + 1)
+            self.latency_sum = 0.0
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def observe(self, seconds):
+        i = next((i for i, b in enumerate(self.buckets) if seconds <= b), len(self.buckets))
+        with self._lock:
+            self.counters["requests"] += 1
+            self.latency_counts[i] += 1
+            self.latency_sum += seconds
+
+    def snapshot(self):
+        with self._lock:
+            labels = [str(b) for b in self.buckets] + ["+Inf"]
+            return {
+                **self.counters,
+                "latency_sum": self.latency_sum,
+                "latency_histogram": dict(zip(labels, self.latency_counts)),
+            }
+
+
+def retry_after(response):
+    """Detik dari header Retry-After (angka atau tanggal HTTP), None jika tidak ada."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class RequestScheduler:
+    """
+    Menjalankan request HTTP dengan:
+      - token bucket bersama (`rate`/`burst`) agar tidak melebihi batas API,
+      - 429: menghormati Retry-After dan menahan SEMUA thread sampai lewat,
+      - 429/5xx/error koneksi: diulang dengan exponential backoff + full jitter
+        (maks `max_retries` kali),
+    serta mencatat statistiknya di `stats`.
+    """
+
+    def __init__(self, rate=10.0, burst=None, max_retries=5, backoff_base=0.5, backoff_max=30.0,
+                 clock=time.monotonic, sleep=time.sleep, rng=None):
+        self.bucket = TokenBucket(rate, burst, clock=clock, sleep=sleep)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        self.stats = RequestStats()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def backoff(self, attempt):
+        return self.rng.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _pause(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, self.clock() + seconds)
+
+    def _wait_pause(self):
+        while True:
+            wait = self._paused_until - self.clock()
+            if wait <= 0:
+                return
+            self.sleep(wait)
+
+    def call(self, send):
+        """
+        `send()` mengirim satu request dan mengembalikan requests.Response.
+        Return response terakhir (pemanggil tetap memakai raise_for_status).
+        """
+        for attempt in range(self.max_retries + 1):
+            self._wait_pause()
+            self.bucket.acquire()
+
+            t = self.clock()
+            try:
+                response, error = send(), None
+            except (requests.ConnectionError, requests.Timeout) as e:
+                response, error = None, e
+            self.stats.observe(self.clock() - t)
+
+            if response is not None and response.status_code not in RETRY_STATUS:
+                return response
+            if attempt == self.max_retries:
+                self.stats.incr("errors")
+                if error is not None:
+                    raise error
+                return response
+
+            delay = self.backoff(attempt)
+            if response is not None and response.status_code == 429:
+                self.stats.incr("throttles")
+                wait = retry_after(response)
+                if wait is not None:
+                    delay = wait
+                self._pause(delay)
+            self.stats.incr("retries")
+            self.sleep(delay)
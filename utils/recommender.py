@@ -1,40 +1,595 @@
+import numpy as np
 import pandas as pd
 import joblib
 import os
+import time
+import threading
 
-# KONFIGURASI PATH
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-MODEL_DIR = os.path.join(BASE_DIR, "..", "models")
+from utils.artifacts import (
+    INDEX_FILE, MODEL_DIR, NEIGHBORS_DIST_FILE, NEIGHBORS_IDX_FILE, SCALED_FILE, SCALER_FILE,
+    current_version, read_manifest,
+)
+from utils.cache import TTLCache
+from utils.catalog import load_catalog
+from utils.genres import get_genre_matrix
+from utils.neighbors import BruteForceIndex, PartitionIndex, load_index
+from utils.perf import register_collector, span, timed
+from utils.search import get_search_index
 
-# LOAD MODEL & DATA SEKALI SAJA
-try:
-    df = pd.read_csv(os.path.join(MODEL_DIR, "indexed_tracks.csv"))
-    knn = joblib.load(os.path.join(MODEL_DIR, "knn_model.pkl"))
-    scaler = joblib.load(os.path.join(MODEL_DIR, "scaler.pkl"))
-except FileNotFoundError:
-    print("Error: Pastikan file model dan data (indexed_tracks, knn_model, scaler) ada di folder 'models/'.")
-    df = pd.DataFrame() # Buat dataframe kosong agar tidak error saat import
-    knn = None
-    scaler = None
 
-FEATURES = ["valence", "energy", "danceability", "tempo", "popularity_track"]
+def standardize(X, scaler):
+    """Sama dengan scaler.transform, tanpa validasi sklearn per panggilan."""
+    X = np.asarray(X, dtype=np.float32)
+    if scaler.mean_ is not None:
+        X = X - scaler.mean_.astype(np.float32)
+    if scaler.scale_ is not None:
+        X = X / scaler.scale_.astype(np.float32)
+    return X
 
-def recommend_by_song(track_id, top_n=10):
+
+# Objek turunan per bundle yang dibangun saat versi dimuat (mis. Recommender
+# milik app). Nama -> factory(bundle); didaftarkan lewat register_resource.
+RESOURCES = {
+    "search": lambda bundle: get_search_index(bundle.catalog),
+    "filters": lambda bundle: SimilarityFilters(bundle),
+    "genres": lambda bundle: get_genre_matrix(bundle.catalog),
+}
+
+
+def register_resource(name, factory):
+    RESOURCES[name] = factory
+
+
+class ModelBundle:
+    """
+    Semua artefak satu versi model: katalog, scaler, fitur ter-scale, indeks
+    tetangga dan tabel top-K (dibaca dari `model_dir`, sebagian besar mmap).
+    Bundle tidak berubah setelah dimuat; request mengambil bundle sekali dan
+    memakainya sampai selesai walau versi baru sudah diaktifkan.
+    """
+
+    def __init__(self, model_dir=MODEL_DIR, version=None):
+        self.model_dir = model_dir
+        self.version = version
+        self.manifest = read_manifest(model_dir)
+        self.catalog = load_catalog(model_dir)
+
+        try:
+            self.scaler = joblib.load(os.path.join(model_dir, SCALER_FILE))
+        except FileNotFoundError:
+            print("Error: Pastikan file scaler.pkl ada di folder 'models/'.")
+            self.scaler = None
+
+        # Fitur ter-scale: features_scaled.npy (mmap) bila cocok, selain itu dari scaler
+        self.X = None
+        path = os.path.join(model_dir, SCALED_FILE)
+        if os.path.exists(path):
+            X = np.load(path, mmap_mode="r")
+            if len(X) == len(self.catalog):
+                self.X = X
+        if self.X is None and self.scaler is not None:
+            self.X = standardize(self.catalog.features, self.scaler)
+
+        # Indeks tetangga dimuat saat pertama dipakai (lihat `index`)
+        self._index = None
+        self._index_lock = threading.Lock()
+
+        # Tabel top-K hasil `train_knn --precompute-k` (indices int32, distances float16)
+        self.neighbor_table = None
+        idx_path = os.path.join(model_dir, NEIGHBORS_IDX_FILE)
+        dist_path = os.path.join(model_dir, NEIGHBORS_DIST_FILE)
+        if os.path.exists(idx_path) and os.path.exists(dist_path):
+            indices = np.load(idx_path, mmap_mode="r")
+            if len(indices) == len(self.catalog):
+                self.neighbor_table = (indices, np.load(dist_path, mmap_mode="r"))
+
+        self._resources = {}
+        self._lock = threading.Lock()
+
+    @property
+    def index(self):
+        """
+        Indeks tetangga: knn_index.pkl (brute/kd/ball/ivf) bila ada, selain itu
+        exact brute force. Dimuat saat pertama dibutuhkan (top_n > K tabel,
+        profil sesi), bukan saat bundle dibuat: bila tabel top-K tersedia,
+        worker yang hanya melayani tabel tidak pernah memuat pohon/norma.
+        """
+        if self._index is None and self.X is not None:
+            with self._index_lock:
+                if self._index is None:
+                    path = os.path.join(self.model_dir, INDEX_FILE)
+                    with span("model.index"):
+                        if os.path.exists(path):
+                            self._index = load_index(path, self.X)
+                        else:
+                            self._index = BruteForceIndex().attach(self.X)
+        return self._index
+
+    def resource(self, name):
+        """Objek turunan `name` (lihat RESOURCES), dibangun sekali per bundle."""
+        value = self._resources.get(name)
+        if value is None:
+            with self._lock:
+                value = self._resources.get(name)
+                if value is None:
+                    value = RESOURCES[name](self)
+                    self._resources[name] = value
+        return value
+
+    def warm(self):
+        """Bangun semua resource terdaftar (dipanggil sebelum bundle diaktifkan)."""
+        for name in list(RESOURCES):
+            self.resource(name)
+        return self
+
+
+# FILTER KEMIRIPAN: "mirip X tapi hanya Calm" / "genre (utama) yang sama dengan X"
+SAME_GENRE = "same"
+
+
+class SimilarityFilters:
+    """
+    Pencarian tetangga terfilter untuk satu bundle. Label per baris dibuat
+    untuk tiap jenis filter (mood, genre utama, atau keduanya) dan indeksnya
+    dipartisi per label (PartitionIndex), sehingga query terfilter hanya
+    memeriksa lagu yang lolos filter. Semua dibuat saat pertama dipakai.
+    """
+
+    def __init__(self, bundle):
+        self.bundle = bundle
+        self._labels = {}
+        self._partitions = {}
+        self._lock = threading.Lock()
+
+    def labels(self, kind):
+        """Label per baris untuk `kind` = ("mood",), ("genre",) atau ("mood", "genre")."""
+        labels = self._labels.get(kind)
+        if labels is None:
+            catalog = self.bundle.catalog
+            mood = np.asarray(catalog.columns["mood"].codes, dtype=np.int64)
+            genre, names = catalog.genre_buckets()
+            genre = genre.astype(np.int64)
+            if kind == ("mood",):
+                labels = mood
+            elif kind == ("genre",):
+                labels = genre
+            else:
+                labels = np.where((mood >= 0) & (genre >= 0), mood * max(len(names), 1) + genre, -1)
+            self._labels[kind] = labels
+        return labels
+
+    def partition(self, kind):
+        index = self._partitions.get(kind)
+        if index is None:
+            with self._lock:
+                index = self._partitions.get(kind)
+                if index is None:
+                    # backend sama dengan indeks utama (manifest); IVF memakai quantizer-nya
+                    bundle = self.bundle
+                    backend = bundle.manifest.get("backend", "brute")
+                    parent = bundle.index if backend == "ivf" else None
+                    index = self._partitions[kind] = PartitionIndex(bundle.X, self.labels(kind), backend, parent)
+        return index
+
+    def query_labels(self, positions, mood=None, genre=None):
+        """
+        (kind, label per seed) untuk filter mood/genre. genre=SAME_GENRE
+        memakai genre utama masing-masing seed. Label -1 = tidak ada lagu
+        yang bisa lolos (mood/genre tidak dikenal, seed tanpa genre).
+        """
+        catalog = self.bundle.catalog
+        kind = tuple(k for k, v in (("mood", mood), ("genre", genre)) if v is not None)
+        m = len(positions)
+
+        mood_code = 0
+        if mood is not None:
+            moods = [str(c) for c in catalog.columns["mood"].categories]
+            mood = str(mood).capitalize()
+            mood_code = moods.index(mood) if mood in moods else -1
+
+        codes, names = catalog.genre_buckets()
+        genre_code = np.zeros(m, dtype=np.int64)
+        if genre == SAME_GENRE:
+            genre_code = codes[positions].astype(np.int64)
+        elif genre is not None:
+            genre = str(genre).strip().lower()
+            genre_code[:] = names.index(genre) if genre in names else -1
+
+        # sama dengan penomoran di labels()
+        if kind == ("mood", "genre"):
+            labels = mood_code * max(len(names), 1) + genre_code
+        elif kind == ("genre",):
+            labels = genre_code.copy()
+        else:
+            labels = np.full(m, mood_code, dtype=np.int64)
+        labels[(genre_code < 0) | (mood_code < 0)] = -1
+        return kind, labels
+
+    def search(self, positions, top_n, mood=None, genre=None):
+        """
+        (distances, indices) top_n per seed yang lolos filter, seed sendiri
+        dikecualikan berdasarkan posisinya. Dari tabel top-K bila baris tabel
+        sudah memuat >= top_n lagu yang lolos, selain itu cari di partisi.
+        Slot tanpa hasil berisi -1.
+        """
+        bundle = self.bundle
+        kind, query_labels = self.query_labels(positions, mood, genre)
+        labels = self.labels(kind)
+        m = len(positions)
+        distances = np.full((m, top_n), np.inf, dtype=np.float32)
+        indices = np.full((m, top_n), -1, dtype=np.int64)
+
+        todo = query_labels >= 0
+        table = bundle.neighbor_table
+        if table is not None and top_n <= table[0].shape[1] and todo.any():
+            rows = np.asarray(table[0][positions], dtype=np.int64)
+            match = (rows >= 0) & (labels[np.maximum(rows, 0)] == query_labels[:, None])
+            full = todo & (match.sum(axis=1) >= top_n)
+            cols = np.argsort(~match, axis=1, kind="stable")[:, :top_n]
+            indices[full] = np.take_along_axis(rows, cols, axis=1)[full]
+            distances[full] = np.take_along_axis(
+                np.asarray(table[1][positions], dtype=np.float32), cols, axis=1)[full]
+            todo &= ~full
+
+        if todo.any():
+            partition = self.partition(kind)
+            for label in np.unique(query_labels[todo]):
+                rows = np.flatnonzero(todo & (query_labels == label))
+                d, i = partition.search(label, bundle.X[positions[rows]], top_n, exclude=positions[rows])
+                distances[rows, :d.shape[1]] = d
+                indices[rows, :i.shape[1]] = i
+        return distances, indices
+
+
+class ModelLoader:
+    """
+    Memegang bundle aktif. Setiap `poll_interval` detik (dicek saat `get`)
+    file models/CURRENT dibaca; bila menunjuk versi lain, versi itu dimuat &
+    dipanaskan di thread latar lalu referensi bundle diganti sekaligus.
+    Selama memuat, request tetap dilayani bundle lama. Versi yang gagal
+    dimuat dilewati sampai CURRENT berubah lagi.
+    """
+
+    def __init__(self, model_dir=MODEL_DIR, poll_interval=5.0):
+        self.model_dir = model_dir
+        self.poll_interval = poll_interval
+        self._bundle = None
+        self._checked = 0.0
+        self._loading = None
+        self._failed = None
+        self._lock = threading.Lock()
+
+    def _version_dir(self, version):
+        if version is None:
+            return self.model_dir
+        return os.path.join(self.model_dir, "versions", version)
+
+    def _load(self, version):
+        with span("model.load"):
+            return ModelBundle(self._version_dir(version), version).warm()
+
+    @property
+    def bundle(self):
+        """Bundle aktif tanpa memuat atau mengecek versi (None bila belum dimuat)."""
+        return self._bundle
+
+    def get(self):
+        bundle = self._bundle
+        if bundle is None:
+            with self._lock:
+                if self._bundle is None:
+                    self._bundle = self._load(current_version(self.model_dir))
+                    self._checked = time.monotonic()
+            return self._bundle
+
+        now = time.monotonic()
+        if now - self._checked >= self.poll_interval:
+            self._checked = now
+            self.check()
+        return bundle
+
+    def check(self, wait=False):
+        """Mulai memuat versi baru bila CURRENT berubah. Return True jika sedang/selesai ganti."""
+        if self._bundle is None:
+            self.get()
+            return False
+        version = current_version(self.model_dir)
+        with self._lock:
+            if version in (self._bundle.version, self._failed) or self._loading is not None:
+                return self._loading is not None
+            self._loading = version
+        thread = threading.Thread(target=self._swap, args=(version,), name="model-reload", daemon=True)
+        thread.start()
+        if wait:
+            thread.join()
+        return True
+
+    def _swap(self, version):
+        t = time.perf_counter()
+        try:
+            bundle = self._load(version)
+        except Exception as e:
+            print(f"Error: gagal memuat model versi {version}: {e}")
+            self._failed = version
+        else:
+            # pergantian referensi atomik; request yang sedang jalan memegang bundle lama
+            self._bundle = bundle
+            print(f"Model versi {version} aktif ({time.perf_counter() - t:.1f} s)")
+        finally:
+            self._loading = None
+
+
+_loader = ModelLoader()
+
+
+def get_loader():
+    return _loader
+
+
+def get_bundle():
+    """Bundle model aktif, atau None bila artefak belum ada."""
+    try:
+        return _loader.get()
+    except FileNotFoundError:
+        print("Error: Pastikan file indexed_tracks.csv ada di folder 'models/'.")
+        return None
+
+
+# CACHE HASIL: seed populer mendominasi trafik; key memuat versi model sehingga
+# hasil versi lama tidak pernah dipakai setelah retrain / update katalog
+RESULT_CACHE_SIZE = 4096
+RESULT_CACHE_TTL = 3600
+result_cache = TTLCache(maxsize=RESULT_CACHE_SIZE, ttl=RESULT_CACHE_TTL)
+
+
+def cache_stats():
+    return result_cache.stats()
+
+
+def mood_cache_stats():
+    # cache Recommender milik bundle aktif (resource "recommender" didaftarkan
+    # app/api); kosong bila model belum dimuat -> scrape tidak memicu load
+    bundle = _loader.bundle
+    if bundle is None or "recommender" not in RESOURCES:
+        return {}
+    return bundle.resource("recommender").cache.stats()
+
+
+register_collector("result_cache", cache_stats)
+register_collector("mood_cache", mood_cache_stats)
+
+
+# MODE AUDIO + GENRE: kandidat dari tetangga audio, lalu diurutkan ulang dengan
+# skor = jarak audio + genre_weight * (1 - Jaccard genre). Jarak dalam satuan
+# fitur ter-standardisasi, jadi genre_weight 0.5 kira-kira setara selisih
+# setengah standar deviasi satu fitur.
+GENRE_WEIGHT = 0.5
+CANDIDATE_FACTOR = 5
+MIN_CANDIDATES = 50
+
+
+def _hybrid_neighbors(bundle, positions, top_n, genre_weight, mood=None, genre=None):
+    n_candidates = max(top_n * CANDIDATE_FACTOR, MIN_CANDIDATES)
+    distances, indices = _neighbors(bundle, positions, n_candidates, mood, genre)
+    with span("neighbors.genre_rerank"):
+        overlap = bundle.resource("genres").jaccard(positions, indices)
+        score = distances + np.float32(genre_weight) * (1 - overlap)
+        score[indices < 0] = np.inf
+        order = np.argsort(score, axis=1, kind="stable")[:, :top_n]
+        indices = np.take_along_axis(indices, order, axis=1)
+        score = np.take_along_axis(score, order, axis=1)
+        indices[~np.isfinite(score)] = -1
+    return score, indices
+
+
+def _neighbors(bundle, positions, top_n, mood=None, genre=None):
+    """
+    Tetangga terdekat untuk posisi seed: dari tabel top-K bila top_n <= K
+    (cukup slicing array), selain itu pencarian live lewat indeks. Dengan
+    filter mood/genre dipakai SimilarityFilters (tabel atau partisi).
+    """
+    if mood is not None or genre is not None:
+        with span("neighbors.filtered"):
+            return bundle.resource("filters").search(positions, top_n, mood, genre)
+    table = bundle.neighbor_table
+    if table is not None and top_n <= table[0].shape[1]:
+        with span("neighbors.table"):
+            indices, distances = table
+            return (np.asarray(distances[positions, :top_n], dtype=np.float32),
+                    np.asarray(indices[positions, :top_n], dtype=np.int64))
+    with span("neighbors.search"):
+        return bundle.index.search(bundle.X[positions], top_n, exclude=positions)
+
+
+def _similar(bundle, positions, top_n, mood=None, genre=None, genre_weight=0.0):
+    if genre_weight:
+        return _hybrid_neighbors(bundle, positions, top_n, genre_weight, mood, genre)
+    return _neighbors(bundle, positions, top_n, mood, genre)
+
+
+@timed("recommend.song")
+def recommend_by_song(track_id, top_n=10, bundle=None, mood=None, genre=None, genre_weight=0.0):
     """
     Merekomendasikan lagu berdasarkan kemiripan dengan track_id tertentu (Content-Based).
+    `mood` / `genre` (opsional) membatasi hasil ke mood atau genre utama
+    tertentu; genre=SAME_GENRE = genre utama yang sama dengan lagu seed.
+    genre_weight > 0 = mode audio + genre (lihat GENRE_WEIGHT).
+    """
+    bundle = bundle or get_bundle()
+    if bundle is None or not len(bundle.catalog) or bundle.X is None:
+        return pd.DataFrame()
+    catalog = bundle.catalog
+
+    key = ("song", bundle.version, bundle.model_dir, track_id, top_n, mood, genre, genre_weight)
+    recommended = result_cache.get(key)
+    if recommended is None:
+        pos = catalog.position(track_id)
+        if pos is None:
+            return pd.DataFrame()
+
+        distances, indices = _similar(bundle, np.array([pos]), top_n, mood, genre, genre_weight)
+
+        # -1 = slot kosong (indeks approximate dengan kandidat terlalu sedikit)
+        recommended = catalog.take(indices[0][indices[0] >= 0])
+        result_cache.set(key, recommended)
+    return recommended.copy()
+
+
+@timed("recommend.songs")
+def recommend_by_songs(track_ids, top_n=10, bundle=None, mood=None, genre=None, genre_weight=0.0):
+    """
+    Versi batch recommend_by_song untuk banyak seed sekaligus (mis. job offline).
+
+    Return satu DataFrame panjang: kolom seed_track_id, rank, distance diikuti
+    kolom katalog lagu rekomendasi. track_id yang tidak dikenal dilewati.
+    Filter `mood` / `genre` dan `genre_weight` sama seperti recommend_by_song
+    (dengan genre_weight > 0 kolom distance berisi skor gabungan).
     """
-    if df.empty or knn is None or scaler is None:
+    bundle = bundle or get_bundle()
+    if bundle is None or not len(bundle.catalog) or bundle.X is None:
+        return pd.DataFrame()
+    catalog = bundle.catalog
+
+    seeds, positions = [], []
+    for t in track_ids:
+        pos = catalog.position(t)
+        if pos is not None:
+            seeds.append(t)
+            positions.append(pos)
+    if not positions:
         return pd.DataFrame()
-        
-    song_data = df[df["track_id"] == track_id]
 
-    if song_data.empty:
+    positions = np.asarray(positions, dtype=np.int64)
+    distances, indices = _similar(bundle, positions, top_n, mood, genre, genre_weight)
+
+    k = indices.shape[1]
+    valid = indices.ravel() >= 0
+    out = catalog.take(indices.ravel()[valid]).reset_index(drop=True)
+    out.insert(0, "seed_track_id", np.repeat(seeds, k)[valid])
+    out.insert(1, "rank", np.tile(np.arange(1, k + 1), len(seeds))[valid])
+    out.insert(2, "distance", distances.ravel()[valid])
+    return out
+
+
+# SESI / PLAYLIST: banyak seed -> satu profil -> satu pencarian
+class SessionProfile:
+    """
+    Profil selera dari sekumpulan lagu seed (playlist atau lagu yang dipilih
+    selama sesi Streamlit): rata-rata berbobot vektor fitur ter-scale.
+    Jumlah berbobot disimpan sehingga menambah/menghapus seed cukup O(d).
+    Seed disimpan sebagai track_id; bila versi model berganti, vektor
+    dihitung ulang dari bundle baru.
+    """
+
+    def __init__(self, track_ids=(), weights=None):
+        self.weights = {}
+        self._sum = None
+        self._total = 0.0
+        self._version = None
+        for i, t in enumerate(track_ids):
+            self.weights[t] = self.weights.get(t, 0.0) + (1.0 if weights is None else float(weights[i]))
+
+    def __len__(self):
+        return len(self.weights)
+
+    @property
+    def track_ids(self):
+        return list(self.weights)
+
+    def _vector(self, bundle, track_id):
+        pos = bundle.catalog.position(track_id)
+        return None if pos is None else np.asarray(bundle.X[pos], dtype=np.float64)
+
+    def _sync(self, bundle):
+        # profil dibangun ulang sekali per versi model (O(n_seed * d))
+        key = (bundle.version, bundle.model_dir)
+        if self._version != key:
+            self._sum = np.zeros(bundle.X.shape[1], dtype=np.float64)
+            self._total = 0.0
+            for t, w in self.weights.items():
+                x = self._vector(bundle, t)
+                if x is not None:
+                    self._sum += w * x
+                    self._total += w
+            self._version = key
+
+    def add(self, track_id, weight=1.0, bundle=None):
+        """Tambah seed (atau tambah bobotnya bila sudah ada). Return False jika track tidak dikenal."""
+        bundle = bundle or get_bundle()
+        self._sync(bundle)
+        x = self._vector(bundle, track_id)
+        if x is None:
+            return False
+        self.weights[track_id] = self.weights.get(track_id, 0.0) + weight
+        self._sum += weight * x
+        self._total += weight
+        return True
+
+    def remove(self, track_id, bundle=None):
+        if track_id not in self.weights:
+            return
+        bundle = bundle or get_bundle()
+        self._sync(bundle)
+        weight = self.weights.pop(track_id)
+        x = self._vector(bundle, track_id)
+        if not self.weights:
+            # profil kosong: buang sisa pembulatan float
+            self._sum[:] = 0.0
+            self._total = 0.0
+        elif x is not None:
+            self._sum -= weight * x
+            self._total -= weight
+
+    def clear(self):
+        self.weights.clear()
+        self._version = None
+
+    def centroid(self, bundle=None):
+        """Vektor profil (ruang fitur ter-scale), None bila belum ada seed yang dikenal."""
+        bundle = bundle or get_bundle()
+        self._sync(bundle)
+        if self._total <= 0:
+            return None
+        return (self._sum / self._total).astype(np.float32)
+
+    def key(self):
+        return tuple(sorted(self.weights.items()))
+
+
+@timed("recommend.profile")
+def recommend_by_profile(profile, top_n=10, bundle=None):
+    """
+    Rekomendasi untuk profil sesi/playlist: satu pencarian tetangga dari
+    centroid seed (bukan N pencarian per seed lalu digabung). Semua seed
+    dikecualikan berdasarkan posisinya. Return DataFrame seperti
+    recommend_by_song ditambah kolom distance (jarak ke centroid).
+    """
+    bundle = bundle or get_bundle()
+    if bundle is None or not len(bundle.catalog) or bundle.X is None or not len(profile):
         return pd.DataFrame()
+    catalog = bundle.catalog
+
+    key = ("profile", bundle.version, bundle.model_dir, profile.key(), top_n)
+    recommended = result_cache.get(key)
+    if recommended is None:
+        centroid = profile.centroid(bundle)
+        if centroid is None:
+            return pd.DataFrame()
+        seeds = [catalog.position(t) for t in profile.track_ids]
+        seeds = np.array([p for p in seeds if p is not None], dtype=np.int64)
+
+        # seed bisa ikut muncul di hasil -> ambil top_n + jumlah seed, lalu buang
+        with span("neighbors.search"):
+            distances, indices = bundle.index.search(centroid[None, :], top_n + len(seeds))
+        keep = (indices[0] >= 0) & ~np.isin(indices[0], seeds)
+        positions, distances = indices[0][keep][:top_n], distances[0][keep][:top_n]
+
+        recommended = catalog.take(positions)
+        recommended.insert(0, "distance", distances)
+        result_cache.set(key, recommended)
+    return recommended.copy()
+
 
-    song = song_data.iloc[0]
-    X = scaler.transform([song[FEATURES]])
-    distances, indices = knn.kneighbors(X, n_neighbors=top_n + 1)
-    
-    # Ambil 1..N (0 adalah lagu itu sendiri)
-    recommended = df.iloc[indices[0][1:]]
-    return recommended
\ No newline at end of file
+def recommend_by_seeds(track_ids, top_n=10, bundle=None, weights=None):
+    """recommend_by_profile untuk daftar seed sekali pakai (mis. playlist dari API)."""
+    return recommend_by_profile(SessionProfile(track_ids, weights), top_n, bundle=bundle)
@@ -0,0 +1,164 @@
+import zlib
+import datetime
+import threading
+import numpy as np
+
+from utils.cache import TTLCache
+
+# Cache set "lagu hari ini" (key memuat tanggal, jadi berganti otomatis tiap hari)
+DAILY_TTL = 24 * 3600
+DAILY_CACHE_SIZE = 256
+
+
+class AliasTable:
+    """
+    Alias table (Walker/Vose) untuk sampling berbobot O(1) per sampel.
+
+    Konstruksi tervektorisasi O(n log n): massa q_i = w_i * n / sum(w).
+    Defisit lagu kecil (q < 1) dan surplus lagu besar (q >= 1) dijajarkan
+    di satu garis lewat cumsum; donor tiap penerima adalah lagu besar yang
+    interval surplusnya memuat awal interval defisit penerima. Lagu besar
+    yang surplusnya habis di tengah defisit lagu kecil menjadi penerima
+    berikutnya dengan donor lagu besar sesudahnya (sama dengan urutan Vose).
+    """
+
+    def __init__(self, weights):
+        w = np.asarray(weights, dtype=np.float64)
+        w = np.where(np.isfinite(w) & (w > 0), w, 0.0)
+        n = len(w)
+        self.n = n
+        self.prob = np.ones(n, dtype=np.float64)
+        self.alias = np.arange(n, dtype=np.int64)
+        total = w.sum()
+        if n == 0 or total <= 0:
+            # tanpa bobot valid -> seragam
+            return
+
+        q = w * (n / total)
+        small = np.flatnonzero(q < 1.0)
+        large = np.flatnonzero(q >= 1.0)
+        if not len(small) or not len(large):
+            return
+
+        deficit = 1.0 - q[small]
+        d_end = np.cumsum(deficit)
+        d_start = d_end - deficit
+        s_end = np.cumsum(q[large] - 1.0)
+
+        # penerima kecil: donor = lagu besar yang surplusnya memuat awal defisit
+        donor = np.minimum(np.searchsorted(s_end, d_start, side="right"), len(large) - 1)
+        self.prob[small] = q[small]
+        self.alias[small] = large[donor]
+
+        # lagu besar yang habis di tengah defisit lagu kecil -> penerima dari lagu besar berikutnya
+        a = np.searchsorted(d_end, s_end[:-1], side="right")
+        inside = a < len(d_end)
+        inside[inside] &= d_start[a[inside]] < s_end[:-1][inside]
+        receivers = np.flatnonzero(inside)
+        self.prob[large[receivers]] = 1.0 - (d_end[a[receivers]] - s_end[receivers])
+        self.alias[large[receivers]] = large[receivers + 1]
+        np.clip(self.prob, 0.0, 1.0, out=self.prob)
+
+    def draw(self, k, rng):
+        """k indeks (dengan pengembalian) sesuai bobot, O(k)."""
+        i = rng.integers(0, self.n, size=k)
+        return np.where(rng.random(k) < self.prob[i], i, self.alias[i])
+
+
+def floyd_sample(n, k, rng):
+    """
+    k indeks unik acak dari range(n) dengan algoritma Floyd: O(k) waktu &
+    memori, tanpa membuat permutasi n elemen. Urutan hasil diacak.
+    """
+    k = min(k, n)
+    chosen = set()
+    out = []
+    for j in range(n - k, n):
+        t = int(rng.integers(0, j + 1))
+        t = j if t in chosen else t
+        chosen.add(t)
+        out.append(t)
+    out = np.array(out, dtype=np.int64)
+    rng.shuffle(out)
+    return out
+
+
+def _weighted_unique(table, k, rng):
+    # sampel berbobot tanpa duplikat: tarik per batch, buang yang sudah terpilih
+    k = min(k, int(np.count_nonzero(table.prob > 0)) or table.n)
+    chosen = {}
+    for _ in range(64):
+        for i in table.draw(max(2 * (k - len(chosen)), 8), rng):
+            chosen.setdefault(int(i), None)
+            if len(chosen) == k:
+                return np.array(list(chosen), dtype=np.int64)
+    # bobot sangat timpang: lengkapi dengan sampel seragam
+    for i in floyd_sample(table.n, min(table.n, 4 * k), rng):
+        chosen.setdefault(int(i), None)
+        if len(chosen) == k:
+            break
+    return np.array(list(chosen), dtype=np.int64)
+
+
+class Sampler:
+    """
+    Sampling lagu acak per mood dalam O(k) dari array posisi per mood yang
+    sudah ada di katalog (Catalog.group_positions). Mode berbobot popularitas
+    memakai AliasTable per mood, dibuat saat pertama dipakai. `daily` memberi
+    set "lagu hari ini" yang sama untuk semua pengguna (seed = tanggal +
+    versi katalog) dan hanya dihitung sekali per hari.
+    """
+
+    def __init__(self, catalog, version=None):
+        self.catalog = catalog
+        self.version = version
+        self.groups = catalog.group_positions("mood") if "mood" in catalog.columns else {}
+        self.n = len(catalog)
+        self._tables = {}
+        self._lock = threading.Lock()
+        self.daily_cache = TTLCache(maxsize=DAILY_CACHE_SIZE, ttl=DAILY_TTL)
+
+    def positions(self, mood=None):
+        """Array posisi untuk mood (None = seluruh katalog)."""
+        if mood is None:
+            return None
+        return self.groups.get(mood, np.array([], dtype=np.int64))
+
+    def _table(self, mood):
+        table = self._tables.get(mood)
+        if table is None:
+            with self._lock:
+                table = self._tables.get(mood)
+                if table is None:
+                    popularity = self.catalog.columns.get("popularity_track")
+                    positions = self.positions(mood)
+                    if popularity is None:
+                        weights = np.ones(self.n if positions is None else len(positions))
+                    else:
+                        popularity = np.asarray(popularity, dtype=np.float64)
+                        weights = popularity if positions is None else popularity[positions]
+                        # +1: lagu popularitas 0 tetap punya peluang kecil
+                        weights = np.nan_to_num(weights) + 1.0
+                    table = self._tables[mood] = AliasTable(weights)
+        return table
+
+    def sample(self, k, mood=None, weighted=False, rng=None):
+        """k posisi katalog unik acak (opsional hanya `mood`, opsional berbobot popularitas)."""
+        rng = rng if rng is not None else np.random.default_rng()
+        positions = self.positions(mood)
+        n = self.n if positions is None else len(positions)
+        if k <= 0 or n == 0:
+            return np.array([], dtype=np.int64)
+        picks = _weighted_unique(self._table(mood), k, rng) if weighted else floyd_sample(n, k, rng)
+        return picks if positions is None else np.asarray(positions[picks], dtype=np.int64)
+
+    def daily(self, k, mood=None, weighted=False, day=None):
+        """Set acak deterministik untuk `day` (default hari ini), dibagi semua pengguna."""
+        day = day or datetime.date.today()
+        key = (day.isoformat(), k, mood, weighted)
+        picks = self.daily_cache.get(key)
+        if picks is None:
+            seed = [day.toordinal(), zlib.crc32(str(self.version).encode()), zlib.crc32(str(mood).encode())]
+            picks = self.sample(k, mood, weighted, np.random.default_rng(seed))
+            self.daily_cache.set(key, picks)
+        return picks.copy()
@@ -0,0 +1,231 @@
+import os
+import mmap
+import numpy as np
+import pandas as pd
+
+from utils.perf import timed
+
+# Kunci posting: trigram byte (24 bit) atau prefix token 1/2 byte (diberi tag di bit 24+)
+UNIGRAM_TAG = 1 << 24
+BIGRAM_TAG = 2 << 24
+
+# Jumlah lagu per blok saat membangun posting (membatasi memori sementara)
+BUILD_BLOCK = 200_000
+
+SPACE, NEWLINE = ord(" "), ord("\n")
+
+# Jumlah posting trigram terpendek yang diiris sebelum verifikasi substring,
+# dan ukuran potongan kandidat per irisan (tetap bisa berhenti dini di `limit`)
+INTERSECT_POSTINGS = 3
+CANDIDATE_CHUNK = 1024
+
+
+class SearchIndex:
+    """
+    Indeks pencarian judul/artis yang dibangun sekali per katalog.
+
+    Setiap lagu diwakili teks "judul\\nartis" lowercase (UTF-8, disimpan urut
+    posisi katalog). Posting list berisi peringkat popularitas lagu untuk
+    setiap trigram byte, serta untuk prefix token 1-2 byte:
+      - query >= 3 byte: substring; kandidat = irisan beberapa posting
+        trigram terpendek, diverifikasi berurutan (sudah urut popularitas)
+        dan berhenti di `limit`.
+      - query 1-2 byte: prefix kata; cukup slice posting list.
+    Query diperlakukan literal (bukan regex).
+    """
+
+    FILES = ("order", "offsets", "keys", "starts", "docs")
+    BLOB_FILE = "search.text.bin"
+
+    def __init__(self, blob, offsets, order, keys, starts, docs):
+        self.blob = blob
+        self.offsets = offsets
+        self.order = order
+        self.keys = keys
+        self.starts = starts
+        self.docs = docs
+
+    @classmethod
+    def build(cls, names, artists, popularity=None):
+        n = len(names)
+        blob, offsets = _encode(names, artists)
+        order, rank = _ranking(popularity, n)
+        combined = np.sort(_postings(blob, offsets, rank))
+        return cls(blob, offsets, order, *_split(combined))
+
+    def extend(self, names, artists, popularity=None):
+        """
+        Indeks baru dengan lagu tambahan di posisi katalog len(self.order)..
+        (mis. update inkremental). `popularity` = kolom popularitas katalog
+        lengkap. Posting lama cukup dipetakan ke peringkat baru (urutannya
+        tetap) lalu digabung dengan posting lagu baru, tanpa membangun ulang.
+        """
+        n_old = len(self.order)
+        new_blob, new_offsets = _encode(names, artists)
+        n = n_old + len(new_offsets) - 1
+        order, rank = _ranking(popularity, n)
+
+        blob = self.blob[:] + new_blob
+        offsets = np.concatenate([np.asarray(self.offsets), self.offsets[-1] + new_offsets[1:]])
+
+        # peringkat lama -> peringkat baru (monoton, jadi tiap posting tetap urut)
+        remap = rank[np.asarray(self.order)].astype(np.uint64)
+        keys = np.repeat(np.asarray(self.keys, dtype=np.uint64), np.diff(self.starts))
+        old = keys << np.uint64(32) | remap[np.asarray(self.docs)]
+        new = np.sort(_postings(new_blob, new_offsets, rank[n_old:]))
+        combined = np.insert(old, np.searchsorted(old, new), new)
+        return SearchIndex(blob, offsets, order, *_split(combined))
+
+    # PERSISTENSI (disimpan di samping katalog biner, dibaca via mmap)
+    def save(self, directory):
+        for name in self.FILES:
+            np.save(os.path.join(directory, f"search.{name}.npy"), getattr(self, name))
+        with open(os.path.join(directory, self.BLOB_FILE), "wb") as f:
+            f.write(self.blob)
+
+    @classmethod
+    def load(cls, directory):
+        arrays = {
+            name: np.load(os.path.join(directory, f"search.{name}.npy"), mmap_mode="r")
+            for name in cls.FILES
+        }
+        with open(os.path.join(directory, cls.BLOB_FILE), "rb") as f:
+            if os.fstat(f.fileno()).st_size:
+                blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                blob = b""
+        return cls(blob, **arrays)
+
+    @classmethod
+    def exists(cls, directory):
+        return os.path.exists(os.path.join(directory, cls.BLOB_FILE))
+
+    def _posting(self, key):
+        i = np.searchsorted(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return self.docs[:0]
+        return self.docs[self.starts[i]:self.starts[i + 1]]
+
+    @timed("search.query")
+    def search(self, query, limit=10):
+        """Posisi katalog yang cocok dengan `query`, urut popularitas (maks `limit`)."""
+        q = str(query).strip().lower().encode("utf-8")
+        if not q or limit <= 0:
+            return np.array([], dtype=np.int64)
+
+        if len(q) == 1:
+            return np.asarray(self.order[self._posting(UNIGRAM_TAG | q[0])[:limit]], dtype=np.int64)
+        if len(q) == 2:
+            return np.asarray(self.order[self._posting(BIGRAM_TAG | q[0] << 8 | q[1])[:limit]], dtype=np.int64)
+
+        trigrams = {q[i] << 16 | q[i + 1] << 8 | q[i + 2] for i in range(len(q) - 2)}
+        postings = sorted((self._posting(t) for t in trigrams), key=len)
+        shortest, others = postings[0], postings[1:INTERSECT_POSTINGS]
+
+        hits = []
+        blob, offsets, order = self.blob, self.offsets, self.order
+        # posting urut peringkat: potongan posting terpendek diiris dengan rentang
+        # peringkat yang sama di posting lain sebelum find, lalu berhenti begitu
+        # `limit` hasil terverifikasi
+        for s in range(0, len(shortest), CANDIDATE_CHUNK):
+            candidates = shortest[s:s + CANDIDATE_CHUNK]
+            lo, hi = candidates[0], candidates[-1]
+            for posting in others:
+                part = posting[np.searchsorted(posting, lo):np.searchsorted(posting, hi, side="right")]
+                candidates = np.intersect1d(candidates, part, assume_unique=True)
+                if not len(candidates):
+                    break
+            for d in candidates:
+                p = order[d]
+                if blob.find(q, offsets[p], offsets[p + 1] - 1) != -1:
+                    hits.append(p)
+                    if len(hits) == limit:
+                        return np.asarray(hits, dtype=np.int64)
+        return np.asarray(hits, dtype=np.int64)
+
+
+def _encode(names, artists):
+    """Blob teks "judul\\nartis" lowercase (dipisah NUL) + offset byte per lagu."""
+    texts = (
+        pd.Series(names, dtype=object).fillna("").astype(str)
+        + "\n"
+        + pd.Series(artists, dtype=object).fillna("").astype(str)
+    ).str.lower()
+    encoded = [t.encode("utf-8") for t in texts.to_numpy()]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) + 1 for e in encoded], out=offsets[1:])
+    blob = b"\x00".join(encoded) + b"\x00" if encoded else b""
+    return blob, offsets
+
+
+def _ranking(popularity, n):
+    """(order, rank): peringkat 0 = paling populer, seri diurutkan menurut posisi."""
+    if popularity is not None:
+        popularity = np.nan_to_num(np.asarray(popularity, dtype=np.float32), nan=-np.inf)
+        order = np.argsort(-popularity, kind="stable")
+    else:
+        order = np.arange(n)
+    rank = np.empty(n, dtype=np.int64)
+    rank[order] = np.arange(n)
+    return order, rank
+
+
+def _postings(blob, offsets, ranks):
+    """Pasangan unik (kunci << 32 | peringkat) untuk semua lagu di `blob`, per blok."""
+    b = np.frombuffer(blob, dtype=np.uint8)
+    n = len(offsets) - 1
+    blocks = [np.array([], dtype=np.uint64)]
+    for s in range(0, n, BUILD_BLOCK):
+        e = min(s + BUILD_BLOCK, n)
+        blocks.append(_block_postings(b[offsets[s]:offsets[e]], offsets[s:e + 1] - offsets[s], ranks[s:e]))
+    return np.concatenate(blocks)
+
+
+def _split(combined):
+    """Array gabungan terurut (kunci << 32 | peringkat) -> (keys, starts, docs)."""
+    keys = combined >> np.uint64(32)
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(keys)) + 1, [len(keys)]]).astype(np.int64)
+    if not len(keys):
+        starts = starts[-1:]
+    docs = (combined & np.uint64(0xFFFFFFFF)).astype(np.int32)
+    return keys[starts[:-1]].astype(np.int64), starts, docs
+
+
+def _block_postings(b, offsets, ranks):
+    """Pasangan unik (kunci << 32 | peringkat) untuk satu blok lagu."""
+    b = b.astype(np.uint32)
+    doc = np.repeat(np.asarray(ranks, dtype=np.uint64), np.diff(offsets))
+    sep = (b == 0) | (b == NEWLINE)
+
+    # trigram di dalam satu field
+    ok3 = ~(sep[:-2] | sep[1:-1] | sep[2:])
+    tri = (b[:-2] << 16 | b[1:-1] << 8 | b[2:])[ok3]
+    tri_doc = doc[:-2][ok3]
+
+    # awal token (setelah separator/spasi) -> prefix 1 & 2 byte
+    boundary = np.ones(len(b), dtype=bool)
+    boundary[1:] = sep[:-1] | (b[:-1] == SPACE)
+    start = boundary & ~sep & (b != SPACE)
+    uni = UNIGRAM_TAG | b[start]
+    ok2 = start[:-1] & ~sep[1:] & (b[1:] != SPACE)
+    bi = BIGRAM_TAG | (b[:-1] << 8 | b[1:])[ok2]
+
+    keys = np.concatenate([tri, uni, bi]).astype(np.uint64)
+    docs = np.concatenate([tri_doc, doc[start], doc[:-1][ok2]])
+    return np.unique(keys << np.uint64(32) | docs)
+
+
+def build_search_index(catalog):
+    columns = catalog.columns
+    return SearchIndex.build(
+        _values(columns["track_name"]), _values(columns["artist_name"]), columns.get("popularity_track")
+    )
+
+
+def _values(col):
+    return col.to_numpy() if hasattr(col, "to_numpy") else np.asarray(col)
+
+
+def get_search_index(catalog):
+    """SearchIndex untuk `catalog` (lihat Catalog.artifact)."""
+    return catalog.artifact("search", SearchIndex, build_search_index)
@@ -1,41 +1,217 @@
-import os, base64, requests
-import spotipy
-from spotipy.oauth2 import SpotifyClientCredentials
-from dotenv import load_dotenv
+import os, base64, time, threading, requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
-TOKEN_URL = "https://accounts.spotify.com/api/token"
-REC_URL = "https://api.spotify.com/v1/recommendations"
+from utils.cache import DiskCache, TTLCache
+from utils.perf import register_collector, span, timed
+from utils.ratelimit import RequestScheduler
+
+try:
+    from dotenv import load_dotenv
+except ImportError:
+    load_dotenv = None
 
 # Load kredensial dari .env
-load_dotenv()
+if load_dotenv is not None:
+    load_dotenv()
 CLIENT_ID = os.getenv("SPOTIFY_CLIENT_ID")
 CLIENT_SECRET = os.getenv("SPOTIFY_CLIENT_SECRET")
 
-sp = spotipy.Spotify(auth_manager=SpotifyClientCredentials(
-    client_id=CLIENT_ID,
-    client_secret=CLIENT_SECRET
-))
+# Base URL bisa diganti (mis. stub server lokal untuk testing)
+ACCOUNTS_URL = os.getenv("SPOTIFY_ACCOUNTS_URL", "https://accounts.spotify.com")
+API_URL = os.getenv("SPOTIFY_API_URL", "https://api.spotify.com")
+TOKEN_URL = ACCOUNTS_URL + "/api/token"
+REC_URL = API_URL + "/v1/recommendations"
+
+# Batas endpoint /v1/tracks?ids=... per request
+TRACKS_BATCH = 50
+# Cache preview: in-memory (LRU) + opsional SQLite (SPOTIFY_CACHE_PATH)
+PREVIEW_TTL = 24 * 3600
+PREVIEW_CACHE_SIZE = 50_000
+CACHE_PATH = os.getenv("SPOTIFY_CACHE_PATH")
+# Token diperbarui sedikit sebelum benar-benar kedaluwarsa
+TOKEN_MARGIN = 60
+# Laju request rata-rata (per detik, semua thread) & jumlah percobaan ulang
+RATE_LIMIT = float(os.getenv("SPOTIFY_RATE_LIMIT", "10"))
+MAX_RETRIES = 5
+
+
+class SpotifyClient:
+    """
+    Klien Web API Spotify dengan satu requests.Session (koneksi di-pool &
+    keep-alive), token client-credentials yang di-cache sampai kedaluwarsa,
+    dan metadata lagu yang diambil per 50 ID lewat /v1/tracks. Beberapa batch
+    diambil paralel dengan jumlah thread terbatas (`max_workers`). Semua
+    request lewat RequestScheduler (rate limit, Retry-After, backoff).
+    """
+
+    def __init__(self, client_id=CLIENT_ID, client_secret=CLIENT_SECRET,
+                 api_url=API_URL, accounts_url=ACCOUNTS_URL,
+                 max_workers=4, timeout=10, cache_ttl=PREVIEW_TTL, cache_path=CACHE_PATH,
+                 scheduler=None):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.api_url = api_url.rstrip("/")
+        self.token_url = accounts_url.rstrip("/") + "/api/token"
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.scheduler = scheduler or RequestScheduler(rate=RATE_LIMIT, max_retries=MAX_RETRIES)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.cache = TTLCache(maxsize=PREVIEW_CACHE_SIZE, ttl=cache_ttl)
+        self.disk_cache = DiskCache(cache_path, ttl=cache_ttl) if cache_path else None
+
+        self._token = None
+        self._token_expires = 0.0
+        self._token_lock = threading.Lock()
+        self._executor = None
+        self._lock = threading.Lock()
+
+    # TOKEN
+    def token(self, force=False):
+        """Access token aktif; hanya meminta token baru bila kedaluwarsa."""
+        with self._token_lock:
+            if force or self._token is None or time.monotonic() >= self._token_expires:
+                auth = base64.b64encode(f"{self.client_id}:{self.client_secret}".encode()).decode()
+                with span("spotify.token"):
+                    r = self.scheduler.call(lambda: self.session.post(
+                        self.token_url,
+                        headers={"Authorization": f"Basic {auth}"},
+                        data={"grant_type": "client_credentials"},
+                        timeout=self.timeout,
+                    ))
+                    r.raise_for_status()
+                body = r.json()
+                self._token = body.get("access_token")
+                self._token_expires = time.monotonic() + max(body.get("expires_in", 3600) - TOKEN_MARGIN, 0)
+            return self._token
+
+    def request(self, url, params=None, token=None):
+        """GET terjadwal (rate limit + retry) dengan bearer token."""
+        return self.scheduler.call(lambda: self.session.get(
+            url, params=params, timeout=self.timeout,
+            headers={"Authorization": f"Bearer {token or self.token()}"},
+        ))
+
+    @timed("spotify.get")
+    def get(self, path, params=None):
+        """GET ke Web API; token yang ditolak (401) diperbarui sekali lalu diulang."""
+        url = self.api_url + path
+        r = self.request(url, params)
+        if r.status_code == 401:
+            r = self.request(url, params, token=self.token(force=True))
+        r.raise_for_status()
+        return r.json()
+
+    def stats(self):
+        return self.scheduler.stats.snapshot()
+
+    # METADATA LAGU
+    def _map(self, fn, items):
+        if len(items) <= 1:
+            return [fn(x) for x in items]
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="spotify")
+        return list(self._executor.map(fn, items))
+
+    def get_tracks(self, track_ids):
+        """Dict track_id -> objek track (None jika tidak ditemukan); 1 request per 50 ID."""
+        ids = list(dict.fromkeys(t for t in track_ids if t))
+        batches = [ids[s:s + TRACKS_BATCH] for s in range(0, len(ids), TRACKS_BATCH)]
+        tracks = {}
+        for batch, body in zip(batches, self._map(lambda b: self.get("/v1/tracks", {"ids": ",".join(b)}), batches)):
+            found = {t["id"]: t for t in body.get("tracks", []) if t}
+            tracks.update({t: found.get(t) for t in batch})
+        return tracks
+
+    @timed("spotify.previews")
+    def get_previews(self, track_ids):
+        """
+        Dict track_id -> (preview_url, spotify_url). Dibaca dari cache memori,
+        lalu cache disk, dan hanya sisanya yang diminta ke API (sekali per 50).
+        Lagu tanpa preview ikut di-cache agar tidak diminta berulang.
+        """
+        ids = list(dict.fromkeys(t for t in track_ids if t))
+        result = self.cache.get_many(ids)
+
+        missing = [t for t in ids if t not in result]
+        if missing and self.disk_cache is not None:
+            from_disk = {t: tuple(v) for t, v in self.disk_cache.get_many(missing).items()}
+            self.cache.set_many(from_disk)
+            result.update(from_disk)
+            missing = [t for t in missing if t not in from_disk]
+
+        if missing:
+            fetched = {}
+            for t, track in self.get_tracks(missing).items():
+                track = track or {}
+                fetched[t] = (track.get("preview_url"), track.get("external_urls", {}).get("spotify"))
+            self.cache.set_many(fetched)
+            if self.disk_cache is not None:
+                self.disk_cache.set_many(fetched)
+            result.update(fetched)
+        return result
+
+    def get_recommendations_by_seed(self, seed_genres, limit=10):
+        return self.get("/v1/recommendations", {"seed_genres": ",".join(seed_genres[:5]), "limit": limit})
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self.session.close()
+        if self.disk_cache is not None:
+            self.disk_cache.close()
+
+
+# KLIEN BERSAMA (satu per kredensial per proses, dipakai semua sesi)
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(client_id=CLIENT_ID, client_secret=CLIENT_SECRET):
+    key = (client_id, client_secret)
+    client = _clients.get(key)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = _clients[key] = SpotifyClient(client_id, client_secret)
+    return client
+
+
+def client_stats():
+    # statistik scheduler klien default (counter + histogram latency), kosong
+    # sebelum klien pertama dibuat
+    client = _clients.get((CLIENT_ID, CLIENT_SECRET))
+    return client.stats() if client is not None else {}
+
+
+register_collector("spotify", client_stats)
+
 
 def get_token(client_id, client_secret):
-    auth = base64.b64encode(f"{client_id}:{client_secret}".encode()).decode()
-    headers = {"Authorization": f"Basic {auth}"}
-    data = {"grant_type":"client_credentials"}
-    r = requests.post(TOKEN_URL, headers=headers, data=data)
-    r.raise_for_status()
-    return r.json().get('access_token')
+    return get_client(client_id, client_secret).token()
 
 def get_recommendations_by_seed(token, seed_genres, limit=10):
-    headers = {"Authorization": f"Bearer {token}"}
     params = {"seed_genres":",".join(seed_genres[:5]), "limit":limit}
-    r = requests.get(REC_URL, headers=headers, params=params)
+    r = get_client().request(REC_URL, params, token=token)
     r.raise_for_status()
     return r.json()
 
-def get_preview_url_from_id(track_id: str):
-    # Mengambil preview_url dari Spotify API berdasarkan track_id
+def get_preview_urls(track_ids):
+    # Versi batch: dipakai saat merender banyak kartu sekaligus
     try:
-        track = sp.track(track_id)
-        return track.get("preview_url"), track.get("external_urls", {}).get("spotify")
+        return get_client().get_previews(track_ids)
     except Exception as e:
-        print(f"Error fetching track {track_id}: {e}")
-        return None, None
\ No newline at end of file
+        print(f"Error fetching tracks: {e}")
+        return {}
+
+def get_preview_url_from_id(track_id: str):
+    # Mengambil preview_url dari Spotify API berdasarkan track_id
+    return get_preview_urls([track_id]).get(track_id, (None, None))
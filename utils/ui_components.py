@@ -1,4 +1,10 @@
 import streamlit as st
+from html import escape
+from textwrap import dedent
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
 
 def sidebar_header():
     with st.container():
@@ -24,17 +30,47 @@ def header():
     """, unsafe_allow_html=True)
 
 
-def music_card(track):
+EMBED_URL = "https://open.spotify.com/embed/track/"
+
+
+def _fmt(value):
+    # angka dibulatkan agar float32 katalog tidak tampil panjang
+    if isinstance(value, (float, np.floating)):
+        return "-" if np.isnan(value) else f"{round(float(value), 3):g}"
+    return "" if value is None else str(value)
+
+
+def music_card(track, lazy=True):
+    """
+    HTML satu kartu lagu (semua field di-escape). Dengan `lazy`, embed Spotify
+    baru dimuat setelah "Putar" diklik (iframe di dalam <details>).
+    """
     track_id = track.get("track_id") or track.get("id") or ""
-    return f"""
+    embed = ""
+    if track_id:
+        iframe = (
+            f'<iframe style="border-radius:12px;margin-top:10px;" src="{EMBED_URL}{quote(str(track_id), safe="")}"'
+            f' width="100%" height="84" loading="lazy"></iframe>'
+        )
+        embed = f'<details class="embed"><summary>▶ Putar</summary>{iframe}</details>' if lazy else iframe
+    return dedent(f"""
     <div class="music-card">
-        <h4 style="margin-bottom:4px;">🎵 {track.get('track_name')}</h4>
+        <h4 style="margin-bottom:4px;">🎵 {escape(_fmt(track.get('track_name')))}</h4>
         <p style="color:#cbd5e1;margin-top:0;">
-            {track.get('artist_name')} |
-            Valence: {track.get('valence')} |
-            Energy: {track.get('energy')} |
-            Popularity: {track.get('popularity_track')}
-        </p>
-        {'<iframe style="border-radius:12px;margin-top:10px;" src="https://open.spotify.com/embed/track/'+track_id+'" width="100%" height="84"></iframe>' if track_id else ''}
+            {escape(_fmt(track.get('artist_name')))} |
+            Valence: {escape(_fmt(track.get('valence')))} |
+            Energy: {escape(_fmt(track.get('energy')))} |
+            Popularity: {escape(_fmt(track.get('popularity_track')))}
+        </p>{embed}
     </div>
+    """).strip()
+
+
+def music_cards(tracks, lazy=True):
+    """
+    Satu blok HTML untuk seluruh daftar lagu (list dict atau DataFrame), agar
+    cukup satu st.markdown per daftar, bukan satu per kartu.
     """
+    if isinstance(tracks, pd.DataFrame):
+        tracks = tracks.to_dict(orient="records")
+    return '<div class="music-list">' + "".join(music_card(t, lazy) for t in tracks) + "</div>"